@@ -1,28 +1,19 @@
-from datetime import datetime
 import json
-from typing import Optional
+from typing import Mapping
 
-from fastapi import File, Form, HTTPException, UploadFile
+from fastapi import HTTPException
 from pydantic import ValidationError
 
 from schemas.activity import ActivityUpdateForm
-from schemas.enums import ActivityCategory, ActivityStatus
 
 
-def get_activity_form(
-    title: Optional[str] = Form(None),
-    description: Optional[str] = Form(None),
-    start_at: Optional[datetime] = Form(None),
-    end_at: Optional[datetime] = Form(None),
-    location_text: Optional[str] = Form(None),
-    contact_info: Optional[str] = Form(None),
-    status: Optional[ActivityStatus] = Form(None),
-    category: Optional[ActivityCategory] = Form(None),
-    image_path: Optional[str] = Form(None),
-) -> ActivityUpdateForm:
-    
+def get_activity_form(fields: Mapping[str, str]) -> ActivityUpdateForm:
+    """
+    Validates the text fields of an activity update form, as read by
+    services.upload_stream.stream_form.
+    """
     parsed_contact_info = None
-    
+    contact_info = fields.get("contact_info")
     if contact_info:    
         try:
             # **FIX: Parse the JSON string into a dictionary**
@@ -36,15 +27,15 @@ def get_activity_form(
 
     try:
         return ActivityUpdateForm(
-            title=title,
-            description=description,
-            start_at=start_at,
-            end_at=end_at,
-            location_text=location_text,
+            title=fields.get("title"),
+            description=fields.get("description"),
+            start_at=fields.get("start_at"),
+            end_at=fields.get("end_at"),
+            location_text=fields.get("location_text"),
             contact_info=parsed_contact_info, # parsed_contact_info
-            status=status,
-            category=category,
-            image_path=image_path,
+            status=fields.get("status"),
+            category=fields.get("category"),
+            image_path=fields.get("image_path"),
         )
 
     except ValidationError as e:
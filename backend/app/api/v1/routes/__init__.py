@@ -3,6 +3,8 @@ from .activity import activity_router
 from .student_class import student_class_router
 from .student_activity import student_activity_router
 from .calendar import calendar_router
+from .internal import internal_router
+from .holiday import holiday_router
 
 __all__ = [
     "auth_router",
@@ -10,4 +12,6 @@ __all__ = [
     "student_class_router",
     "student_activity_router",
     "calendar_router",
+    "internal_router",
+    "holiday_router",
 ]
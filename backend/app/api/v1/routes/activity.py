@@ -1,10 +1,24 @@
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
 from api.v1.dependencies import get_activity_form
+from services.upload_stream import StreamedUpload, stream_form
 from services.activity_service import check_activity_exist
+from services.activity_status import effective_status, status_epoch, with_effective_status
 from crud.activity import (
     create_activity,
     get_activity_by_id,
+    get_activity_version,
+    get_status_boundaries,
     get_all_thumbnail_activities,
+    get_thumbnail_activities_page,
+    search_activities,
     delete_activity,
     get_activity_dates,
     update_activity,
@@ -14,12 +28,17 @@ from schemas.activity import (
     ActivityCreate,
     ActivityCategory,
     ActivityStatus,
+    ActivitySearchPage,
+    ActivityThumbnailPage,
     ActivityThumbnailResponse,
     ActivityUpdateForm,
     ActivityResponse,
     ContactType,
 )
 from schemas.auth import User
+from core.config import ACTIVITY_PAGE_DEFAULT_SIZE, ACTIVITY_PAGE_MAX_SIZE
+from services.etag import CATALOGUE_VERSION_KEY, get_version, is_not_modified, make_etag
+from utils.pagination import decode_cursor, encode_cursor
 from pydantic import ValidationError
 from typing import List, Optional
 from uuid import UUID
@@ -30,55 +49,52 @@ activity_router = APIRouter()
 
 
 @activity_router.post("/", status_code=status.HTTP_201_CREATED)
-async def add_activity(
-    title: str = Form(...),
-    description: str = Form(...),
-    start_at: datetime = Form(...),
-    end_at: datetime = Form(...),
-    location_text: str = Form(...),
-    contact_info: str = Form(...),
-    status: ActivityStatus = Form(...),
-    category: ActivityCategory = Form(...),
-    image_path: str = Form(None),
-    image_file: UploadFile = File(None),
-    current_user: User = Depends(get_current_user),
-):
+async def add_activity(request: Request, current_user: User = Depends(get_current_user)):
+    """
+    Multipart form with title, description, start_at, end_at,
+    location_text, contact_info (JSON object), status, category and either
+    image_path or an image_file upload. The form is parsed as it streams in,
+    see services.upload_stream.stream_form.
+    """
     if current_user.role not in ["officer", "admin"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to add activities",
         )
 
-    try:
-        # Step 1: Load the JSON string into a Python dict
-        loaded_contact_info = json.loads(contact_info)
+    async with stream_form(request) as (fields, image_file):
+        contact_info_data = None
+        if "contact_info" in fields:
+            try:
+                # Step 1: Load the JSON string into a Python dict
+                loaded_contact_info = json.loads(fields["contact_info"])
 
-        # Step 2: Convert string keys to ContactType enum members
-        contact_info_data = {
-            ContactType(key): value for key, value in loaded_contact_info.items()
-        }
-    except (json.JSONDecodeError, ValueError) as e:
-        raise HTTPException(status_code=400, detail=f"Invalid contact_info: {e}")
+                # Step 2: Convert string keys to ContactType enum members
+                contact_info_data = {
+                    ContactType(key): value for key, value in loaded_contact_info.items()
+                }
+            except (json.JSONDecodeError, ValueError, AttributeError) as e:
+                raise HTTPException(status_code=400, detail=f"Invalid contact_info: {e}")
 
-    try:
-        activity = ActivityCreate(
-            title=title,
-            description=description,
-            start_at=start_at,
-            end_at=end_at,
-            location_text=location_text,
-            contact_info=contact_info_data,
-            status=status,
-            category=category,
-            image_path=image_path,
-        )
-    except ValidationError as e:
-        # Pydantic's validation error is more specific
-        raise HTTPException(status_code=422, detail=e.errors())
-    try:
-        new_id = await create_activity(activity, image_file, current_user.id)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        try:
+            activity = ActivityCreate(
+                title=fields.get("title"),
+                description=fields.get("description"),
+                start_at=fields.get("start_at"),
+                end_at=fields.get("end_at"),
+                location_text=fields.get("location_text"),
+                contact_info=contact_info_data,
+                status=fields.get("status"),
+                category=fields.get("category"),
+                image_path=fields.get("image_path"),
+            )
+        except ValidationError as e:
+            # Pydantic's validation error is more specific
+            raise HTTPException(status_code=422, detail=e.errors())
+        try:
+            new_id = await create_activity(activity, image_file, current_user.id)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
 
     return {
         "id": new_id,
@@ -88,44 +104,194 @@ async def add_activity(
 
 
 @activity_router.get("/activity/{activity_id}", response_model=ActivityResponse)
-def read_activity(
+async def read_activity(
     activity_id: UUID,
+    request: Request,
+    response: Response,
     current_active_user: User = Depends(get_current_active_user),
 ):
     try:
-        activity = get_activity_by_id(activity_id)
-        return activity
+        now = datetime.now(timezone.utc)
+        version = await get_activity_version(activity_id)
+        updated_at = version["updated_at"] if version else None
+        if version is not None:
+            # The status is derived at read time, so the ETag must change
+            # when the activity starts or ends even if the row does not
+            etag = make_etag(
+                "activity",
+                activity_id,
+                updated_at.isoformat(),
+                effective_status(
+                    version["status"], version["start_at"], version["end_at"], now
+                ),
+            )
+            if is_not_modified(request, etag, "activity"):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+            response.headers["ETag"] = etag
+
+        activity = await get_activity_by_id(activity_id)
+        # A cached copy older than the row (written by another process) must
+        # not be pinned to the new version's ETag
+        if activity and activity["updated_at"] != updated_at:
+            response.headers.pop("ETag", None)
+        return with_effective_status(activity, now)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # Endpoint for thumbnail-only activities
 @activity_router.get("/thumbnails", response_model=List[ActivityThumbnailResponse])
-def read_thumbnail_activities(
+async def read_thumbnail_activities(
+    request: Request,
+    response: Response,
     current_active_user: User = Depends(get_current_active_user),
 ):
+    now = datetime.now(timezone.utc)
+    etag = make_etag(
+        "thumbnails",
+        get_version(CATALOGUE_VERSION_KEY),
+        status_epoch(await get_status_boundaries(), now),
+    )
+    if is_not_modified(request, etag, "thumbnails"):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
     try:
-        activities = get_all_thumbnail_activities()
-        return activities
+        activities = await get_all_thumbnail_activities()
+        return [with_effective_status(activity, now) for activity in activities]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@activity_router.get("/thumbnails/page", response_model=ActivityThumbnailPage)
+async def read_thumbnail_activities_page(
+    request: Request,
+    response: Response,
+    limit: int = Query(ACTIVITY_PAGE_DEFAULT_SIZE, ge=1, le=ACTIVITY_PAGE_MAX_SIZE),
+    cursor: Optional[str] = None,
+    status_filter: Optional[ActivityStatus] = Query(None, alias="status"),
+    category: Optional[ActivityCategory] = None,
+    starts_from: Optional[datetime] = Query(None, alias="from"),
+    starts_before: Optional[datetime] = Query(None, alias="to"),
+    current_active_user: User = Depends(get_current_active_user),
+):
+    """
+    Thumbnails newest first, `limit` at a time. Pass the returned
+    `next_cursor` as `cursor` to get the following page; it is null on the
+    last one. `from`/`to` bound start_at (from inclusive, to exclusive).
+    """
+    now = datetime.now(timezone.utc)
+    etag = make_etag(
+        "thumbnails-page",
+        get_version(CATALOGUE_VERSION_KEY),
+        status_epoch(await get_status_boundaries(), now),
+        request.url.query,
+    )
+    if is_not_modified(request, etag, "thumbnails_page"):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    after = None
+    if cursor:
+        start_at, activity_id = decode_cursor(cursor, 2)
+        try:
+            after = (datetime.fromisoformat(start_at), str(UUID(activity_id)))
+        except (TypeError, AttributeError, ValueError):
+            raise HTTPException(
+                status_code=422,
+                detail=[{"loc": ["query", "cursor"], "msg": "Invalid cursor"}],
+            )
+
+    rows = await get_thumbnail_activities_page(
+        limit,
+        cursor=after,
+        status=status_filter.value if status_filter else None,
+        category=category.value if category else None,
+        starts_from=starts_from,
+        starts_before=starts_before,
+    )
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["start_at"].isoformat(), rows[-1]["id"])
+
+    response.headers["ETag"] = etag
+    return ActivityThumbnailPage(
+        items=[with_effective_status(row, now) for row in rows], next_cursor=next_cursor
+    )
+
+
+@activity_router.get("/search", response_model=ActivitySearchPage)
+async def search_activity(
+    q: str = Query(..., min_length=2, max_length=200),
+    limit: int = Query(ACTIVITY_PAGE_DEFAULT_SIZE, ge=1, le=ACTIVITY_PAGE_MAX_SIZE),
+    cursor: Optional[str] = None,
+    status_filter: Optional[ActivityStatus] = Query(None, alias="status"),
+    category: Optional[ActivityCategory] = None,
+    current_active_user: User = Depends(get_current_active_user),
+):
+    """
+    Ranked search over title, location and description. `q` accepts web
+    search syntax ("quoted phrases", -excluded words) and tolerates partial
+    words and typos. Paged like /thumbnails/page.
+    """
+    after = None
+    if cursor:
+        rank, activity_id = decode_cursor(cursor, 2)
+        try:
+            after = (float(rank), str(UUID(activity_id)))
+        except (TypeError, AttributeError, ValueError):
+            raise HTTPException(
+                status_code=422,
+                detail=[{"loc": ["query", "cursor"], "msg": "Invalid cursor"}],
+            )
+
+    rows = await search_activities(
+        q.strip(),
+        limit,
+        cursor=after,
+        status=status_filter.value if status_filter else None,
+        category=category.value if category else None,
+    )
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["rank"], rows[-1]["id"])
+
+    now = datetime.now(timezone.utc)
+    return ActivitySearchPage(
+        items=[with_effective_status(row, now) for row in rows], next_cursor=next_cursor
+    )
+
+
 # Update Data
 @activity_router.patch("/{activity_id}", response_model=ActivityResponse)
 async def edit_activity(
     activity_id: UUID,
-    form_data: ActivityUpdateForm = Depends(get_activity_form),
-    image_file: Optional[UploadFile] = File(None),
+    request: Request,
     current_user: User = Depends(get_current_user),
 ):
+    """
+    Form with any of add_activity's fields, plus an optional image_file
+    upload, parsed as it streams in.
+    """
     if current_user.role not in ["officer", "admin"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to update activities",
         )
 
-    existing_activity_date = get_activity_dates(str(activity_id))
+    async with stream_form(request) as (fields, image_file):
+        return await _apply_activity_update(
+            activity_id, get_activity_form(fields), image_file
+        )
+
+
+async def _apply_activity_update(
+    activity_id: UUID, form_data: ActivityUpdateForm, image_file: StreamedUpload | None
+):
+    existing_activity_date = await get_activity_dates(str(activity_id))
     if not existing_activity_date:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -177,14 +343,14 @@ async def edit_activity(
 
 
 @activity_router.delete("/{activity_id}", status_code=status.HTTP_200_OK)
-def remove_activity(activity_id: UUID, current_user: User = Depends(get_current_user)):
+async def remove_activity(activity_id: UUID, current_user: User = Depends(get_current_user)):
     if current_user.role not in ["officer", "admin"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to delete activities",
         )
     try:
-        deleted_activity = delete_activity(str(activity_id))
+        deleted_activity = await delete_activity(str(activity_id))
         if not deleted_activity:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -1,13 +1,14 @@
 from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, status, Response
 from fastapi.security import OAuth2PasswordRequestForm
-from crud.user import create_user
+from crud.user import create_user, deactivate_user
 from schemas.auth import User, UserRegister
 from services.auth import authenticate_user
 from core.security import (
+    build_token_claims,
     create_access_token,
     get_current_active_user,
-    get_hash_password,
+    get_hash_password_async,
 )
 from core.config import ACCESS_TOKEN_EXPIRE_MINUTES
 from datetime import timedelta
@@ -17,10 +18,10 @@ auth_router = APIRouter()
 
 # --- Login route ---
 @auth_router.post("/login")
-def login(
+async def login(
     response: Response, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
 ):
-    user = authenticate_user(form_data.username, form_data.password)
+    user = await authenticate_user(form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -30,7 +31,7 @@ def login(
 
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user["username"]}, expires_delta=access_token_expires
+        data=build_token_claims(user), expires_delta=access_token_expires
     )
 
     response.set_cookie(
@@ -53,10 +54,10 @@ async def register_user(user: UserRegister, current_user: User = Depends(get_cur
     
     try:
         # Hash password before storing
-        hashed_pw = get_hash_password(user.password)
+        hashed_pw = await get_hash_password_async(user.password)
 
         # Insert into your custom "users" table
-        create_user(
+        await create_user(
             UserRegister(
                 username=user.username,
                 password=hashed_pw,
@@ -67,10 +68,29 @@ async def register_user(user: UserRegister, current_user: User = Depends(get_cur
 
         return {"message": "User registered successfully"}
 
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@auth_router.post("/deactivate/{username}")
+async def deactivate(username: str, current_user: User = Depends(get_current_active_user)):
+    """
+    Officers and admins only. Blocks the user from logging in and drops
+    their cached row and token state, so their existing sessions stop
+    working on the next request instead of when the cache expires.
+    """
+    if current_user.role not in ["officer", "admin"]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Unauthorized")
+
+    records = await deactivate_user(username)
+    if not records:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+    return {"message": "User deactivated successfully"}
+
+
 @auth_router.get("/check")
 async def auth_check(current_user: Annotated[User, Depends(get_current_active_user)]):
     return {"success": True}
@@ -1,55 +1,98 @@
-from datetime import date
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date, time, timedelta
+from email.utils import format_datetime, parsedate_to_datetime
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 
-from schemas.calendar import DailyScheduleResponse, MonthlyScheduleResponse
-from crud.student_activity import get_daily_activity, get_monthly_activities_crud
-from crud.student_class import get_daily_classes, get_monthly_classes
+from core.config import (
+    CALENDAR_RANGE_MAX_DAYS,
+    CALENDAR_RANGE_STREAM_THRESHOLD_DAYS,
+    FREE_SLOTS_MAX_DAYS,
+)
+from schemas.calendar import (
+    DailyScheduleResponse,
+    FreeSlotsResponse,
+    MonthlyScheduleResponse,
+    RangeScheduleResponse,
+)
+from schemas.student_class import MonthlyClassItem
+from crud.student_activity import (
+    get_activities_between,
+    get_daily_activity,
+    get_monthly_activities_crud,
+)
+from crud.student_class import (
+    get_classes_between,
+    get_daily_classes,
+    get_monthly_classes,
+)
 from core.security import get_current_active_user
 from schemas.auth import User
+from services.calendar_service import gather_sources
+from services.etag import (
+    CATALOGUE_VERSION_KEY,
+    HOLIDAYS_VERSION_KEY,
+    get_version,
+    is_not_modified,
+    make_etag,
+    student_version_key,
+)
+from services.schedule_conflicts import find_free_slots
+from services.ics_service import create_ics_token, decode_ics_token, get_ics_feed
+from services.schedule_invalidation import schedule_cache, schedule_cache_key
 
 calendar_router = APIRouter()
 
 
-# WAIT FOR DELETE
-@calendar_router.get("/daily")
-async def get_daily_schedule(
-    current_user: User = Depends(get_current_active_user),
-) -> DailyScheduleResponse:
-    if current_user.role != "student":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only students can access their daily schedule",
-        )
-
-    today = date.today()
+async def _fetch_schedule(classes_source, activities_source) -> tuple[list, list, list]:
+    """
+    Fetches classes and activities concurrently. A failed source is returned
+    as an empty list plus a warning; only when both fail is it an error.
+    """
+    results, warnings = await gather_sources(
+        {"classes": classes_source, "activities": activities_source}
+    )
 
-    try:
-        classes_list_records = await get_daily_classes(current_user, today)
-        classes_list_dicts = [dict(record) for record in classes_list_records]
-    except Exception as e:
+    if results["classes"] is None and results["activities"] is None:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error fetching daily classes: {e}",
+            detail="Error fetching schedule: " + "; ".join(warnings),
         )
 
-    try:
-        # This function is synchronous, so no await
-        activities_list = get_daily_activity(user_id=current_user.id, target_date=today)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error fetching daily activities: {e}",
-        )
+    classes = [dict(record) for record in results["classes"] or []]
+    activities = results["activities"] or []
+    return classes, activities, warnings
+
 
-    return DailyScheduleResponse(
-        date=today, classes=classes_list_dicts, activities=activities_list
+def _schedule_etag(current_user: User, view: str, *parts) -> str:
+    """
+    A student's schedule changes when their own version is bumped (classes,
+    cancellations, enrollments), when any activity changes or when holidays
+    change.
+    """
+    return make_etag(
+        view,
+        current_user.id,
+        get_version(student_version_key(current_user.id)),
+        get_version(CATALOGUE_VERSION_KEY),
+        get_version(HOLIDAYS_VERSION_KEY),
+        *parts,
     )
 
 
-# MIGRATE TO THIS API
-@calendar_router.get("/daily/{target_date}")
-async def get_daily_schedule(
-    current_user: User = Depends(get_current_active_user), target_date: date = None
+def _store_schedule(current_user: User, cache_key: tuple, etag: str, result) -> None:
+    """
+    Caches a freshly assembled schedule unless a write landed while it was
+    being fetched, in which case the version (and so the ETag) has moved on
+    and the result may already be stale.
+    """
+    _, _, view, day = cache_key
+    if _schedule_etag(current_user, view, day) == etag:
+        schedule_cache.set(cache_key, result)
+
+
+async def _daily_schedule(
+    current_user: User, target_date: date, request: Request, response: Response
 ) -> DailyScheduleResponse:
     if current_user.role != "student":
         raise HTTPException(
@@ -57,122 +100,297 @@ async def get_daily_schedule(
             detail="Only students can access their daily schedule",
         )
 
-    target_date = target_date
+    etag = _schedule_etag(current_user, "daily", target_date)
+    if is_not_modified(request, etag, "calendar_daily"):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
 
-    try:
-        classes_list_records = await get_daily_classes(current_user, target_date)
-        classes_list_dicts = [dict(record) for record in classes_list_records]
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error fetching daily classes: {e}",
-        )
+    cache_key = schedule_cache_key(current_user.id, "daily", target_date)
+    cached = schedule_cache.get(cache_key)
+    if cached is not None:
+        response.headers["ETag"] = etag
+        return cached
 
-    try:
-        # This function is synchronous, so no await
-        activities_list = get_daily_activity(
-            user_id=current_user.id, target_date=target_date
-        )
-    except Exception as e:
+    classes, activities, warnings = await _fetch_schedule(
+        get_daily_classes(current_user, target_date),
+        get_daily_activity(user_id=current_user.id, target_date=target_date),
+    )
+    result = DailyScheduleResponse(
+        date=target_date, classes=classes, activities=activities, warnings=warnings
+    )
+
+    # A partial result must not be revalidated later as if it were complete
+    if not warnings:
+        response.headers["ETag"] = etag
+        _store_schedule(current_user, cache_key, etag, result)
+
+    return result
+
+
+async def _monthly_schedule(
+    current_user: User, target_date: date, request: Request, response: Response
+) -> MonthlyScheduleResponse:
+    if current_user.role != "student":
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error fetching daily activities: {e}",
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only students can access their monthly schedule",
         )
 
-    return DailyScheduleResponse(
-        date=target_date, classes=classes_list_dicts, activities=activities_list
+    month_start = target_date.replace(day=1)
+    etag = _schedule_etag(current_user, "monthly", month_start)
+    if is_not_modified(request, etag, "calendar_monthly"):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    cache_key = schedule_cache_key(current_user.id, "monthly", month_start)
+    cached = schedule_cache.get(cache_key)
+    if cached is not None:
+        response.headers["ETag"] = etag
+        return cached
+
+    classes, activities, warnings = await _fetch_schedule(
+        get_monthly_classes(current_user, target_date),
+        get_monthly_activities_crud(current_user.id, target_date=target_date),
+    )
+    result = MonthlyScheduleResponse(
+        classes=classes, activities=activities, warnings=warnings
     )
 
+    if not warnings:
+        response.headers["ETag"] = etag
+        _store_schedule(current_user, cache_key, etag, result)
+
+    return result
+
+
+# WAIT FOR DELETE
+@calendar_router.get("/daily")
+async def get_daily_schedule(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_active_user),
+) -> DailyScheduleResponse:
+    return await _daily_schedule(current_user, date.today(), request, response)
+
+
+# MIGRATE TO THIS API
+@calendar_router.get("/daily/{target_date}")
+async def get_daily_schedule(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_active_user),
+    target_date: date = None,
+) -> DailyScheduleResponse:
+    return await _daily_schedule(current_user, target_date, request, response)
+
 
 @calendar_router.get("/monthly")
 async def get_monthly_schedule(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_active_user),
+) -> MonthlyScheduleResponse:
+    return await _monthly_schedule(current_user, date.today(), request, response)
+
+
+@calendar_router.get("/monthly/{target_date}")
+async def get_monthly_schedule(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
+    target_date: date = None,
 ) -> MonthlyScheduleResponse:
-    
+    return await _monthly_schedule(current_user, target_date, request, response)
+
+
+async def _stream_range(current_user: User, start_date: date, end_date: date):
+    """
+    Yields NDJSON lines one chunk of CALENDAR_RANGE_STREAM_THRESHOLD_DAYS at
+    a time, so only one chunk is held in memory.
+    """
+    seen_activity_ids = set()
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(
+            chunk_start + timedelta(days=CALENDAR_RANGE_STREAM_THRESHOLD_DAYS - 1),
+            end_date,
+        )
+        try:
+            classes, activities, warnings = await _fetch_schedule(
+                get_classes_between(current_user, chunk_start, chunk_end),
+                get_activities_between(current_user.id, chunk_start, chunk_end),
+            )
+        except HTTPException as e:
+            # Headers are already sent, report the failed chunk in-band
+            classes, activities, warnings = [], [], [str(e.detail)]
+
+        for item in classes:
+            line = MonthlyClassItem(**item).model_dump(mode="json")
+            yield json.dumps({"type": "class", **line}) + "\n"
+        for activity in activities:
+            # Activities spanning two chunks are only sent once
+            if activity.id in seen_activity_ids:
+                continue
+            seen_activity_ids.add(activity.id)
+            yield json.dumps({"type": "activity", **activity.model_dump(mode="json")}) + "\n"
+        for warning in warnings:
+            yield json.dumps({"type": "warning", "message": warning}) + "\n"
+
+        chunk_start = chunk_end + timedelta(days=1)
+
+
+@calendar_router.get("/range", response_model=RangeScheduleResponse)
+async def get_range_schedule(
+    request: Request,
+    response: Response,
+    start_date: date = Query(..., alias="from"),
+    end_date: date = Query(..., alias="to"),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Classes and activities between `from` and `to` (both inclusive) in one
+    round-trip. Windows longer than CALENDAR_RANGE_STREAM_THRESHOLD_DAYS are
+    streamed as NDJSON, one `{"type": "class" | "activity" | "warning", ...}`
+    object per line.
+    """
     if current_user.role != "student":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only students can access their monthly schedule",
+            detail="Only students can access their schedule",
         )
 
-    today = date.today()
-
-    try:
-        monthly_classes = await get_monthly_classes(current_user, today)
-    except HTTPException:
+    days = (end_date - start_date).days + 1
+    if days < 1:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error fetching monthly classes: {e}",
+            status_code=422,
+            detail=[{"loc": ["query", "to"], "msg": "to must not be before from"}],
         )
-    except Exception as e:
-        print(f"Unexpected error in get_monthly_schedule: {e}")
+    if days > CALENDAR_RANGE_MAX_DAYS:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error fetching monthly activities.",
+            status_code=422,
+            detail=[
+                {
+                    "loc": ["query", "to"],
+                    "msg": f"Range is limited to {CALENDAR_RANGE_MAX_DAYS} days",
+                }
+            ],
         )
 
-    try:
-        monthly_activities = get_monthly_activities_crud(current_user.id, target_date=today)
-    except HTTPException:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error fetching monthly classes: {e}",
-        )
-    except Exception as e:
-        print(f"Unexpected error in get_monthly_schedule: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error fetching monthly activities.",
+    etag = _schedule_etag(current_user, "range", start_date, end_date)
+    if is_not_modified(request, etag, "calendar_range"):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    if days > CALENDAR_RANGE_STREAM_THRESHOLD_DAYS:
+        return StreamingResponse(
+            _stream_range(current_user, start_date, end_date),
+            media_type="application/x-ndjson",
         )
 
-    classes_as_dicts = [dict(record) for record in monthly_classes]
+    classes, activities, warnings = await _fetch_schedule(
+        get_classes_between(current_user, start_date, end_date),
+        get_activities_between(current_user.id, start_date, end_date),
+    )
 
-    return {"classes": classes_as_dicts, "activities": monthly_activities}
+    if not warnings:
+        response.headers["ETag"] = etag
+    return RangeScheduleResponse(
+        start_date=start_date,
+        end_date=end_date,
+        classes=classes,
+        activities=activities,
+        warnings=warnings,
+    )
 
 
-@calendar_router.get("/monthly/{target_date}")
-async def get_monthly_schedule(
-    current_user: User = Depends(get_current_active_user), target_date: date = None
-) -> MonthlyScheduleResponse:
-    
+@calendar_router.get("/free-slots", response_model=FreeSlotsResponse)
+async def get_free_slots(
+    start_date: date = Query(..., alias="from"),
+    end_date: date = Query(..., alias="to"),
+    day_start: time = Query(time(8, 0)),
+    day_end: time = Query(time(20, 0)),
+    min_minutes: int = Query(30, ge=5, le=24 * 60),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Free time between `from` and `to` (both inclusive), limited to
+    day_start..day_end in the calendar timezone, around classes and enrolled
+    activities.
+    """
     if current_user.role != "student":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only students can access their monthly schedule",
+            detail="Only students can access their schedule",
         )
 
-    current_month = target_date
-
-    try:
-        monthly_classes = await get_monthly_classes(current_user, current_month)
-    except HTTPException:
+    days = (end_date - start_date).days + 1
+    if days < 1 or days > FREE_SLOTS_MAX_DAYS:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error fetching monthly classes: {e}",
+            status_code=422,
+            detail=[
+                {
+                    "loc": ["query", "to"],
+                    "msg": f"Range must be 1 to {FREE_SLOTS_MAX_DAYS} days",
+                }
+            ],
         )
-    except Exception as e:
-        print(f"Unexpected error in get_monthly_schedule: {e}")
+    if day_end <= day_start:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error fetching monthly activities.",
+            status_code=422,
+            detail=[{"loc": ["query", "day_end"], "msg": "day_end must be after day_start"}],
         )
 
-    try:
-        monthly_activities = get_monthly_activities_crud(
-            current_user.id, target_date=current_month
-        )
-    except HTTPException:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error fetching monthly classes: {e}",
-        )
-    except Exception as e:
-        print(f"Unexpected error in get_monthly_schedule: {e}")
+    slots = await find_free_slots(
+        current_user, start_date, end_date, day_start, day_end, min_minutes
+    )
+    return FreeSlotsResponse(start_date=start_date, end_date=end_date, slots=slots)
+
+
+@calendar_router.get("/ics-link")
+async def get_ics_link(
+    request: Request, current_user: User = Depends(get_current_active_user)
+):
+    """Subscription URL for Google/Apple Calendar, private to this student."""
+    if current_user.role != "student":
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error fetching monthly activities.",
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only students have a schedule feed",
         )
 
-    classes_as_dicts = [dict(record) for record in monthly_classes]
+    token = await create_ics_token(current_user.id)
+    return {"url": str(request.url_for("read_ics_feed", token=token))}
+
+
+def _not_modified(request: Request, feed: dict) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        return feed["etag"] in [tag.strip() for tag in if_none_match.split(",")]
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return feed["last_modified"] <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+@calendar_router.get("/ics/{token}")
+async def read_ics_feed(token: str, request: Request):
+    """
+    iCalendar feed of a student's classes (as RRULEs with EXDATEs for
+    cancellations) and enrolled activities. Authenticated by the token in the
+    URL since calendar clients cannot send the auth cookie.
+    """
+    student_id = await decode_ics_token(token.removesuffix(".ics"))
+    if not student_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Feed not found")
+
+    feed = await get_ics_feed(student_id)
+    headers = {
+        "ETag": feed["etag"],
+        "Last-Modified": format_datetime(feed["last_modified"], usegmt=True),
+        "Cache-Control": "private, max-age=300",
+    }
+
+    if _not_modified(request, feed):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
-    return {"classes": classes_as_dicts, "activities": monthly_activities}
+    return Response(content=feed["body"], media_type="text/calendar", headers=headers)
@@ -0,0 +1,51 @@
+from datetime import date
+from typing import List
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from core.security import get_current_active_user
+from crud.holiday import create_holiday, delete_holiday, list_holidays
+from schemas.auth import User
+from schemas.holiday import HolidayIn, HolidayResponse
+
+holiday_router = APIRouter()
+
+
+def require_officer(current_user: User = Depends(get_current_active_user)) -> User:
+    if current_user.role not in ["officer", "admin"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have permission to manage holidays",
+        )
+    return current_user
+
+
+@holiday_router.get("/", response_model=List[HolidayResponse])
+async def read_holidays(
+    start_date: date = Query(..., alias="from"),
+    end_date: date = Query(..., alias="to"),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Holidays overlapping `from`..`to`, both inclusive."""
+    return await list_holidays(start_date, end_date)
+
+
+@holiday_router.post(
+    "/", response_model=HolidayResponse, status_code=status.HTTP_201_CREATED
+)
+async def add_holiday(
+    payload: HolidayIn, current_user: User = Depends(require_officer)
+):
+    """
+    Suppresses every class (or only `class_code`) on each day from
+    start_date to end_date, for all students.
+    """
+    return await create_holiday(payload, current_user.id)
+
+
+@holiday_router.delete("/{holiday_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def remove_holiday(
+    holiday_id: uuid.UUID, current_user: User = Depends(require_officer)
+):
+    await delete_holiday(holiday_id)
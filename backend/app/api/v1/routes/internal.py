@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from core.security import get_current_active_user, hash_pool_stats
+from crud.user import user_cache
+from db.base import get_pool, read_pool_stats
+from services.etag import etag_stats
+from services.image_pipeline import image_pool_stats
+from services.schedule_invalidation import catalogue_cache, ics_cache, schedule_cache
+from schemas.auth import User
+
+internal_router = APIRouter()
+
+
+def require_admin(current_user: User = Depends(get_current_active_user)) -> User:
+    if current_user.role not in ["officer", "admin"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have permission to view internal metrics",
+        )
+    return current_user
+
+
+@internal_router.get("/pool")
+async def read_pool_metrics(current_user: User = Depends(require_admin)):
+    pool = get_pool()
+    if not pool:
+        raise HTTPException(status_code=500, detail="DB pool not initialized")
+
+    return {"primary": pool.stats(), "read_replica": read_pool_stats()}
+
+
+@internal_router.get("/caches")
+async def read_cache_metrics(current_user: User = Depends(require_admin)):
+    return {
+        "users": user_cache.stats(),
+        "password_hash_pool": hash_pool_stats,
+        "image_pool": image_pool_stats,
+        "ics_feeds": ics_cache.stats(),
+        "schedules": schedule_cache.stats(),
+        "catalogue": {
+            **catalogue_cache.stats(),
+            "thumbnails_age_seconds": catalogue_cache.age("thumbnails"),
+        },
+        "etags": {
+            endpoint: {
+                **stats,
+                "hit_ratio": (
+                    stats["not_modified"] / stats["requests"] if stats["requests"] else 0.0
+                ),
+            }
+            for endpoint, stats in etag_stats.items()
+        },
+    }
@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends, status, HTTPException
 from schemas.student_activity import StudentActivityCreate
+from crud.activity import get_activity_dates
 from crud.student_activity import (
     create_student_activity,
 )
+from services.schedule_conflicts import find_conflicts
+from schemas.calendar import ScheduleConflict
 
 from core.security import get_current_active_user
 from schemas.auth import User
@@ -16,13 +19,28 @@ student_activity_router = APIRouter()
     status_code=status.HTTP_201_CREATED,
     summary="Add an activity to the current student's list",
 )
-def add_student_activity(
+async def add_student_activity(
     payload: StudentActivityCreate,
     current_user: User = Depends(get_current_active_user),
 ):
 
     try:
-        new_id = create_student_activity(
+        # Looked up before the insert, so a failure here leaves nothing
+        # behind and the client can simply retry. The activity is still
+        # added, overlaps are reported for the client to show.
+        dates = await get_activity_dates(str(payload.activity_id))
+        conflicts = (
+            await find_conflicts(
+                current_user,
+                dates["start_at"],
+                dates["end_at"],
+                exclude_activity_id=payload.activity_id,
+            )
+            if dates
+            else []
+        )
+
+        new_id = await create_student_activity(
             student_id=current_user.id, activity_id=payload.activity_id
         )
 
@@ -30,6 +48,7 @@ def add_student_activity(
             "id": new_id,
             "message": "Activity added successfully",
             "success": True,
+            "conflicts": [ScheduleConflict(**conflict) for conflict in conflicts],
         }
     except HTTPException as e:
         raise e
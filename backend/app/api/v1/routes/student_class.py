@@ -1,14 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from crud.student_class import (
+    bulk_cancel_student_classes_crud,
     cancel_student_class_crud,
     create_student_class_crud,
 )
 from core.security import get_current_active_user
 from schemas.auth import User
 from schemas.student_class import (
+    BulkClassCancellationIn,
     ClassCancellationIn,
     StudentClassIn,
 )
+from services.class_import import import_student_classes
 
 student_class_router = APIRouter()
 
@@ -27,6 +30,41 @@ async def create_student_class(
     return await create_student_class_crud(payload)
 
 
+@student_class_router.post("/bulk")
+async def bulk_import_student_classes(
+    request: Request,
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Imports many classes from a streamed request body.
+
+    - `text/csv`: one meeting per row, consecutive rows of the same class
+      (student_id, class_code, section, start/end date) are grouped.
+    - `application/x-ndjson`: one `StudentClassIn` JSON object per line.
+
+    Rows are written in chunked transactions. Invalid rows are reported by
+    line number and do not stop the import.
+    """
+    if current_user.role not in ["officer", "admin"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have permission to import classes",
+        )
+
+    content_type = request.headers.get("content-type", "")
+    if "csv" in content_type:
+        file_format = "csv"
+    elif "ndjson" in content_type or "jsonl" in content_type:
+        file_format = "ndjson"
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Body must be text/csv or application/x-ndjson",
+        )
+
+    return await import_student_classes(request.stream(), file_format)
+
+
 # Process this cancellation request using the details
 @student_class_router.post("/cancel")
 async def cancel_student_class(
@@ -53,3 +91,18 @@ async def cancel_student_class(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An unexpected error occurred: {str(e)}",
         )
+
+
+@student_class_router.post("/cancel/bulk")
+async def bulk_cancel_student_classes(
+    payload: BulkClassCancellationIn,
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Cancels a class (by `class_code`, for every student taking it) or a list
+    of meetings on every day they meet between start_date and end_date.
+
+    Officers and admins can cancel any class, students only their own.
+    Dates already cancelled are skipped, `created` counts the new ones.
+    """
+    return await bulk_cancel_student_classes_crud(payload, current_user)
@@ -3,4 +3,80 @@ import os
 # Load env variables
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
\ No newline at end of file
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
+
+# In-process cache of authenticated users (keyed by username)
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "1024"))
+
+# Dedicated worker pool for bcrypt hashing/verification on the login path
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+
+# "lookup" resolves the user row on every request, "claims" trusts the
+# id/role/is_active embedded in the token and only checks the revocation table
+TOKEN_CLAIMS_MODE = os.getenv("TOKEN_CLAIMS_MODE", "lookup")
+TOKEN_STATE_REFRESH_SECONDS = float(os.getenv("TOKEN_STATE_REFRESH_SECONDS", "30"))
+
+# Bulk semester class import
+CLASS_IMPORT_CHUNK_SIZE = int(os.getenv("CLASS_IMPORT_CHUNK_SIZE", "500"))
+CLASS_IMPORT_MAX_ERRORS = int(os.getenv("CLASS_IMPORT_MAX_ERRORS", "1000"))
+
+# "sql" expands weekly meetings with generate_series in Postgres,
+# "python" expands them in-process and honours class_meetings.repeat_rule,
+# "materialized" reads the class_occurrences table kept up to date on writes
+CLASS_EXPANSION_MODE = os.getenv("CLASS_EXPANSION_MODE", "sql")
+
+# Per-source timeout for the calendar fan-out (classes / activities)
+CALENDAR_SOURCE_TIMEOUT_SECONDS = float(os.getenv("CALENDAR_SOURCE_TIMEOUT_SECONDS", "5"))
+
+# /calendar/range limits: windows longer than the stream threshold are sent as NDJSON
+CALENDAR_RANGE_MAX_DAYS = int(os.getenv("CALENDAR_RANGE_MAX_DAYS", "366"))
+CALENDAR_RANGE_STREAM_THRESHOLD_DAYS = int(
+    os.getenv("CALENDAR_RANGE_STREAM_THRESHOLD_DAYS", "62")
+)
+
+# Longest window /calendar/free-slots computes in one response
+FREE_SLOTS_MAX_DAYS = int(os.getenv("FREE_SLOTS_MAX_DAYS", "62"))
+
+# iCalendar subscription feed
+ICS_CACHE_TTL_SECONDS = float(os.getenv("ICS_CACHE_TTL_SECONDS", "300"))
+ICS_CACHE_MAX_SIZE = int(os.getenv("ICS_CACHE_MAX_SIZE", "2048"))
+CALENDAR_TIMEZONE = os.getenv("CALENDAR_TIMEZONE", "Asia/Bangkok")
+
+# Assembled daily/monthly calendar responses per student
+SCHEDULE_CACHE_TTL_SECONDS = float(os.getenv("SCHEDULE_CACHE_TTL_SECONDS", "600"))
+SCHEDULE_CACHE_MAX_SIZE = int(os.getenv("SCHEDULE_CACHE_MAX_SIZE", "4096"))
+
+# Longest a 304 may be served for data changed through another process,
+# whose writes do not bump this process's ETag versions
+ETAG_MAX_STALE_SECONDS = float(os.getenv("ETAG_MAX_STALE_SECONDS", "60"))
+
+# Keyset-paginated activity listings
+ACTIVITY_PAGE_DEFAULT_SIZE = int(os.getenv("ACTIVITY_PAGE_DEFAULT_SIZE", "20"))
+ACTIVITY_PAGE_MAX_SIZE = int(os.getenv("ACTIVITY_PAGE_MAX_SIZE", "100"))
+
+# Shared activity catalogue cache (thumbnails list and single activities):
+# fresh for the TTL, then served stale for up to the stale window while a
+# background refresh runs
+CATALOGUE_CACHE_TTL_SECONDS = float(os.getenv("CATALOGUE_CACHE_TTL_SECONDS", "30"))
+CATALOGUE_CACHE_STALE_SECONDS = float(os.getenv("CATALOGUE_CACHE_STALE_SECONDS", "300"))
+CATALOGUE_CACHE_MAX_SIZE = int(os.getenv("CATALOGUE_CACHE_MAX_SIZE", "1024"))
+
+# Seconds between bulk status updates (upcoming -> running -> finished);
+# 0 disables the scheduler, responses derive the status either way
+ACTIVITY_STATUS_INTERVAL_SECONDS = float(os.getenv("ACTIVITY_STATUS_INTERVAL_SECONDS", "60"))
+
+# Activity image variants, rendered on a process pool
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", "40000000"))
+# Also write JPEG copies of every variant for clients without WebP support
+IMAGE_JPEG_FALLBACK = os.getenv("IMAGE_JPEG_FALLBACK", "true").lower() == "true"
+
+# Uploaded activity images: hard size limit, enforced while the upload streams
+IMAGE_MAX_UPLOAD_BYTES = int(os.getenv("IMAGE_MAX_UPLOAD_BYTES", str(5 * 1024 * 1024)))
+# Whole multipart request, enforced while the body streams: the image plus
+# room for the other form fields
+MULTIPART_MAX_REQUEST_BYTES = int(
+    os.getenv("MULTIPART_MAX_REQUEST_BYTES", str(IMAGE_MAX_UPLOAD_BYTES + 256 * 1024))
+)
@@ -0,0 +1,73 @@
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class MultipartSizeLimitMiddleware:
+    """
+    Rejects multipart/form-data requests larger than `max_bytes` with 413
+    while the body is still arriving, before Starlette spools the whole
+    upload. Declared sizes are refused up front, chunked bodies as soon as
+    the running total crosses the limit.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+
+        too_large = JSONResponse(
+            {"detail": f"Request body is larger than {self.max_bytes} bytes"},
+            status_code=413,
+            headers={"connection": "close"},
+        )
+
+        content_length = headers.get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            await too_large(scope, receive, send)
+            return
+
+        received = 0
+        exceeded = False
+        responded = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal responded
+            if exceeded:
+                # FastAPI turns the failed body read into its own 400,
+                # answer with the 413 instead
+                if not responded:
+                    responded = True
+                    await too_large(scope, receive, send)
+                return
+            responded = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _BodyTooLarge:
+            if not responded:
+                responded = True
+                await too_large(scope, receive, send)
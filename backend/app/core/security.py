@@ -1,3 +1,4 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from types import SimpleNamespace
 from typing import Annotated
@@ -5,9 +6,18 @@ from fastapi import Depends, HTTPException, Request, status
 from passlib.context import CryptContext
 from schemas.auth import TokenData, User
 from jwt.exceptions import InvalidTokenError
-from core.config import SECRET_KEY, ALGORITHM
-from crud.user import get_user
+from core.config import (
+    SECRET_KEY,
+    ALGORITHM,
+    PASSWORD_HASH_MAX_PENDING,
+    PASSWORD_HASH_WORKERS,
+    TOKEN_CLAIMS_MODE,
+)
+from core.token_state import is_token_current
+from crud.user import get_cached_user
+import asyncio
 import jwt
+import time
 
 # Create CryptContext (bcrypt is the default algorithm here)
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -23,6 +33,72 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+# bcrypt is CPU-bound, so it gets its own small pool instead of competing
+# with sync endpoints for the shared AnyIO threadpool. bcrypt releases the
+# GIL while hashing, so threads are enough here.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt"
+)
+_hash_pending = 0
+
+hash_pool_stats = {
+    "workers": PASSWORD_HASH_WORKERS,
+    "max_pending": PASSWORD_HASH_MAX_PENDING,
+    "pending": 0,
+    "completed": 0,
+    "rejected": 0,
+    "queue_wait_total": 0.0,
+    "queue_wait_max": 0.0,
+}
+
+
+async def _run_in_hash_pool(func, *args):
+    """
+    Runs `func` on the bcrypt pool. Fails fast with 503 once
+    PASSWORD_HASH_MAX_PENDING calls are queued or running.
+    """
+    global _hash_pending
+
+    if _hash_pending >= PASSWORD_HASH_MAX_PENDING:
+        hash_pool_stats["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Login service is busy, please try again shortly",
+            headers={"Retry-After": "1"},
+        )
+
+    queued_at = time.perf_counter()
+
+    def timed_call():
+        # Time spent waiting for a free worker
+        waited = time.perf_counter() - queued_at
+        return waited, func(*args)
+
+    _hash_pending += 1
+    hash_pool_stats["pending"] = _hash_pending
+    try:
+        loop = asyncio.get_running_loop()
+        waited, result = await loop.run_in_executor(_hash_executor, timed_call)
+    finally:
+        _hash_pending -= 1
+        hash_pool_stats["pending"] = _hash_pending
+
+    hash_pool_stats["completed"] += 1
+    hash_pool_stats["queue_wait_total"] += waited
+    hash_pool_stats["queue_wait_max"] = max(hash_pool_stats["queue_wait_max"], waited)
+    return result
+
+
+async def get_hash_password_async(password: str) -> str:
+    """Hash the password on the dedicated bcrypt pool"""
+    return await _run_in_hash_pool(get_hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the dedicated bcrypt pool"""
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     if expires_delta:
@@ -34,6 +110,26 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     return encoded_jwt
 
 
+def build_token_claims(user: dict) -> dict:
+    """
+    Claims for a new access token. In "claims" mode the token carries
+    everything get_current_user needs, so no user lookup is required.
+    """
+    claims = {"sub": user["username"]}
+    if TOKEN_CLAIMS_MODE == "claims":
+        claims.update(
+            {
+                "id": str(user["id"]),
+                "role": user["role"],
+                "is_active": user.get("is_active"),
+                "first_name_th": user.get("first_name_th"),
+                "last_name_th": user.get("last_name_th"),
+                "ver": user.get("token_version") or 0,
+            }
+        )
+    return claims
+
+
 async def get_current_user(request: Request):
     token = request.cookies.get("access_token")
     credentials_exception = HTTPException(
@@ -49,14 +145,25 @@ async def get_current_user(request: Request):
         token_data = TokenData(username=username)
     except InvalidTokenError:
         raise credentials_exception
-    user = get_user(username=token_data.username)
-    if user is None:
-        raise credentials_exception
 
-    # Remove unneccessary data
-    user_data_dict = {
-        k: v for k, v in user.data[0].items() if k not in ["password", "created_at"]
-    }  # Omit password and created_at
+    # Self-contained token, only the revocation table is consulted
+    if TOKEN_CLAIMS_MODE == "claims" and "id" in payload and "role" in payload:
+        if not await is_token_current(payload["id"], payload.get("ver", 0)):
+            raise credentials_exception
+
+        return User(
+            id=payload["id"],
+            username=username,
+            first_name_th=payload.get("first_name_th"),
+            last_name_th=payload.get("last_name_th"),
+            is_active=payload.get("is_active"),
+            role=payload["role"],
+        )
+
+    # Cached lookup, skips the users table on repeat requests
+    user_data_dict = await get_cached_user(username=token_data.username)
+    if user_data_dict is None:
+        raise credentials_exception
 
     return User(**user_data_dict)
 
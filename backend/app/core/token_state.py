@@ -0,0 +1,111 @@
+import asyncio
+import time
+from core.config import TOKEN_STATE_REFRESH_SECONDS
+from db.base import get_pool
+
+# user id -> (token_version, is_active), refreshed from the users table.
+# Used in "claims" token mode and for ICS feed tokens to reject tokens of
+# deactivated users or tokens issued before the user's token_version was
+# bumped.
+_token_state: dict[str, tuple[int, bool]] = {}
+# user id -> monotonic time the entry was loaded. The refresher only runs in
+# "claims" mode, so entries older than TOKEN_STATE_REFRESH_SECONDS are
+# reloaded on use instead.
+_loaded_at: dict[str, float] = {}
+
+
+async def refresh_token_state() -> int:
+    """
+    Reloads the version table from the users table.
+    Returns the number of users loaded.
+    """
+    pool = get_pool()
+    if not pool:
+        raise RuntimeError("DB pool not initialized")
+
+    async with pool.acquire() as conn:
+        records = await conn.fetch("SELECT id, is_active, token_version FROM users")
+
+    global _token_state, _loaded_at
+    _token_state = {
+        str(row["id"]): (row["token_version"] or 0, bool(row["is_active"]))
+        for row in records
+    }
+    _loaded_at = dict.fromkeys(_token_state, time.monotonic())
+    return len(_token_state)
+
+
+def revoke_user_tokens(user_id: str) -> None:
+    """
+    Marks every token of this user as revoked until the next refresh
+    reloads the real state from the database.
+    """
+    version, _ = _token_state.get(str(user_id), (0, False))
+    _token_state[str(user_id)] = (version + 1, False)
+
+
+async def _load_user_state(user_id: str) -> tuple[int, bool]:
+    pool = get_pool()
+    if not pool:
+        raise RuntimeError("DB pool not initialized")
+
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow(
+            "SELECT is_active, token_version FROM users WHERE id = $1", user_id
+        )
+
+    # Unknown (e.g. deleted) users are remembered as revoked
+    state = (row["token_version"] or 0, bool(row["is_active"])) if row else (-1, False)
+    _token_state[user_id] = state
+    _loaded_at[user_id] = time.monotonic()
+    return state
+
+
+async def _get_user_state(user_id: str) -> tuple[int, bool] | None:
+    """
+    The user's (token_version, is_active), from the table while it is fresh
+    and from the database otherwise. A stale entry is still used if the
+    database cannot be reached; None if there is no entry at all.
+    """
+    state = _token_state.get(user_id)
+    if (
+        state is not None
+        and time.monotonic() - _loaded_at.get(user_id, 0) <= TOKEN_STATE_REFRESH_SECONDS
+    ):
+        return state
+
+    try:
+        return await _load_user_state(user_id)
+    except Exception as e:
+        print(f"Error loading token state for {user_id}: {e}")
+        return state
+
+
+async def is_token_current(user_id: str, token_version: int) -> bool:
+    # Users not loaded yet (created after the last refresh, deleted, or the
+    # refresher has not succeeded yet) are looked up; the token is refused
+    # if that is not possible
+    state = await _get_user_state(str(user_id))
+    if state is None:
+        return False
+
+    version, is_active = state
+    return is_active and token_version == version
+
+
+async def get_token_version(user_id) -> int:
+    """Current token_version of the user, for minting tokens that carry it."""
+    state = await _get_user_state(str(user_id))
+    if state is None:
+        raise RuntimeError(f"Token state of {user_id} is unavailable")
+    return state[0]
+
+
+async def token_state_refresher(interval: float):
+    """Background task started from the app lifespan."""
+    while True:
+        try:
+            await refresh_token_state()
+        except Exception as e:
+            print(f"Error refreshing token state: {e}")
+        await asyncio.sleep(interval)
@@ -1,3 +1,3 @@
-from .user import create_user, get_user
+from .user import create_user, deactivate_user, get_cached_user, get_user
 
-__all__ = ["create_user", "get_user"]
+__all__ = ["create_user", "deactivate_user", "get_cached_user", "get_user"]
@@ -1,13 +1,21 @@
 from uuid import uuid4
 from datetime import datetime, timezone
-from db.base import supabase
+from db.base import get_pool, get_read_pool
 
-from fastapi import UploadFile
+from fastapi import HTTPException
+from crud.student_activity import get_enrolled_student_ids, invalidate_enrolled_students
+from services.schedule_invalidation import (
+    catalogue_cache,
+    invalidate_activities,
+    invalidate_student_schedule,
+)
+from services.activity_status import STATUS_CONDITIONS
 from services.activity_service import (
     delete_activity_image,
     move_activity_image,
     upload_activity_image,
 )
+from services.upload_stream import StreamedUpload
 
 from schemas.activity import (
     ActivityCreate,
@@ -16,97 +24,334 @@ from schemas.activity import (
     ActivityUpdateForm,
 )
 
+# Columns that may be written through update_activity
+UPDATABLE_COLUMNS = {
+    "title",
+    "description",
+    "start_at",
+    "end_at",
+    "location_text",
+    "contact_info",
+    "image_path",
+    "image_variants",
+    "status",
+    "category",
+    "updated_at",
+}
+
 
 async def create_activity(
-    activity: ActivityCreate, image_file: UploadFile, created_by: str
+    activity: ActivityCreate, image_file: StreamedUpload | None, created_by: str
 ) -> str:
     """
     Inserts a new activity into the database.
     Returns the UUID of the new activity.
     """
+    pool = get_pool()
+    if not pool:
+        raise HTTPException(status_code=500, detail="DB pool not initialized")
+
     new_id = str(uuid4())
 
     img_public_url = activity.image_path
+    image_variants = None
     if not img_public_url and image_file:
-        img_public_url = await upload_activity_image(
+        uploaded = await upload_activity_image(
             activity.category.value, activity.title, image_file, image_file.filename
         )
+        img_public_url = uploaded["image_path"]
+        image_variants = uploaded["image_variants"]
+
+    now = datetime.now(timezone.utc)
+    async with pool.acquire() as conn:
+        inserted = await conn.fetchval(
+            """
+            INSERT INTO activities (
+              id, created_by, title, description, start_at, end_at,
+              location_text, contact_info, image_path, image_variants, status,
+              category, created_at, updated_at
+            ) VALUES ($1,$2,$3,$4,$5,$6,$7,$8,$9,$10,$11,$12,$13,$14)
+            RETURNING id
+            """,
+            new_id,
+            str(created_by),
+            activity.title,
+            activity.description,
+            activity.start_at,
+            activity.end_at,
+            activity.location_text,
+            activity.model_dump(mode="json")["contact_info"],
+            img_public_url,
+            image_variants,
+            activity.status.value,
+            activity.category.value,
+            now,
+            now,
+        )
+    if not inserted:
+        raise Exception(f"Insert failed for activity {new_id}")
 
-    data = {
-        "id": new_id,
-        "created_by": str(created_by),
-        "title": activity.title,
-        "description": activity.description,
-        "start_at": activity.start_at.isoformat(),
-        "end_at": activity.end_at.isoformat(),
-        "location_text": activity.location_text,
-        "contact_info": activity.contact_info,
-        "image_path": img_public_url,
-        "status": activity.status.value,
-        "category": activity.category.value,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "updated_at": datetime.now(timezone.utc).isoformat(),
-    }
-    
-    response = supabase.table("activities").insert(data).execute()
-    if not response.data:
-        raise Exception(f"Insert failed: {response}")
+    invalidate_activities()
 
     return new_id
 
 
-def get_activity_by_id(activity_id: str) -> ActivityResponse:
+async def _fetch_activity(activity_id: str) -> ActivityResponse:
+    pool = get_pool()
+    if not pool:
+        raise HTTPException(status_code=500, detail="DB pool not initialized")
+
+    async with pool.acquire() as conn:
+        record = await conn.fetchrow(
+            "SELECT * FROM activities WHERE id = $1", str(activity_id)
+        )
+    if not record:
+        return []
+    return dict(record)
+
+
+async def get_activity_by_id(activity_id: str) -> ActivityResponse:
     """
-    Retrieves all activities from the database, ordered by creation date.
+    Retrieves a single activity by its ID, through the shared catalogue cache.
     """
-    response = (
-        supabase.table("activities")
-        .select("*")
-        .eq("id", activity_id)
-        .single()  # ensures it returns one object, not a list
-        .execute()
+    return await catalogue_cache.get_or_load(
+        ("activity", str(activity_id)), lambda: _fetch_activity(activity_id)
     )
-    if not response.data:
-        return []
-    return response.data
 
 
-def get_all_thumbnail_activities() -> ActivityThumbnailResponse:
-    response = (
-        supabase.table("activities")
-        .select("id, title, image_path, start_at, end_at, status, category")
-        .order("start_at", desc=True)
-        .execute()
+async def get_activity_version(activity_id: str) -> dict | None:
+    """
+    Only the columns an activity's ETag depends on (its version column and
+    what its effective status is derived from), enough to answer a
+    conditional GET without loading the row.
+    """
+    pool = get_pool()
+    if not pool:
+        raise HTTPException(status_code=500, detail="DB pool not initialized")
+
+    async with pool.acquire() as conn:
+        record = await conn.fetchrow(
+            "SELECT updated_at, status, start_at, end_at FROM activities WHERE id = $1",
+            str(activity_id),
+        )
+    return dict(record) if record else None
+
+
+async def get_status_boundaries() -> list[datetime]:
+    """
+    Sorted start and end times of every activity that is not cancelled, the
+    moments at which some effective status changes. Through the catalogue
+    cache, so it is reloaded whenever an activity changes.
+    """
+    return await catalogue_cache.get_or_load("status_boundaries", _fetch_status_boundaries)
+
+
+async def _fetch_status_boundaries() -> list[datetime]:
+    pool = get_pool()
+    if not pool:
+        raise HTTPException(status_code=500, detail="DB pool not initialized")
+
+    async with pool.acquire() as conn:
+        records = await conn.fetch(
+            "SELECT start_at, end_at FROM activities WHERE status <> 'cancelled'"
+        )
+    return sorted(
+        moment for record in records for moment in (record["start_at"], record["end_at"])
     )
-    if not response.data:
-        return []
-    return response.data
 
 
-def get_activity_dates(activity_id: str) -> dict | None:
+async def get_all_thumbnail_activities() -> ActivityThumbnailResponse:
+    """Every activity's thumbnail, through the shared catalogue cache."""
+    return await catalogue_cache.get_or_load("thumbnails", _fetch_all_thumbnails)
+
+
+async def _fetch_all_thumbnails() -> ActivityThumbnailResponse:
+    pool = get_pool()
+    if not pool:
+        raise HTTPException(status_code=500, detail="DB pool not initialized")
+
+    async with pool.acquire() as conn:
+        records = await conn.fetch(
+            """
+            SELECT
+                id, title, COALESCE(image_variants->>'thumb', image_path) AS image_path,
+                start_at, end_at, status, category
+            FROM activities
+            ORDER BY start_at DESC
+            """
+        )
+    return [dict(record) for record in records]
+
+
+async def get_thumbnail_activities_page(
+    limit: int,
+    cursor: tuple[datetime, str] | None = None,
+    status: str | None = None,
+    category: str | None = None,
+    starts_from: datetime | None = None,
+    starts_before: datetime | None = None,
+) -> list[dict]:
+    """
+    One page of thumbnails ordered by (start_at, id) descending, after
+    `cursor` (the sort key of the previous page's last row). Returns up to
+    limit + 1 rows so the caller can tell whether another page follows.
+    """
+    pool = get_pool()
+    if not pool:
+        raise HTTPException(status_code=500, detail="DB pool not initialized")
+
+    conditions = []
+    args = []
+
+    def bind(value) -> str:
+        args.append(value)
+        return f"${len(args)}"
+
+    if status is not None:
+        conditions.append(STATUS_CONDITIONS[status])
+    if category is not None:
+        conditions.append(f"category = {bind(category)}")
+    if starts_from is not None:
+        conditions.append(f"start_at >= {bind(starts_from)}")
+    if starts_before is not None:
+        conditions.append(f"start_at < {bind(starts_before)}")
+    if cursor is not None:
+        conditions.append(f"(start_at, id) < ({bind(cursor[0])}, {bind(cursor[1])})")
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    async with pool.acquire() as conn:
+        records = await conn.fetch(
+            f"""
+            SELECT
+                id, title, COALESCE(image_variants->>'thumb', image_path) AS image_path,
+                start_at, end_at, status, category
+            FROM activities
+            {where}
+            ORDER BY start_at DESC, id DESC
+            LIMIT {bind(limit + 1)}
+            """,
+            *args,
+        )
+    return [dict(record) for record in records]
+
+
+async def search_activities(
+    query: str,
+    limit: int,
+    cursor: tuple[float, str] | None = None,
+    status: str | None = None,
+    category: str | None = None,
+) -> list[dict]:
+    """
+    Activities matching `query` by full-text search or trigram word
+    similarity on title, location and description, best match first.
+    Keyset paged on (rank, id) like get_thumbnail_activities_page, and
+    likewise returns up to limit + 1 rows.
+
+    Each kind of match is its own branch so each can use its index (OR-ing
+    them made the planner scan and rank the whole table), and matches are
+    ranked before the cursor applies so that is not pushed down into the
+    scan either. Descriptions are only matched by similarity when nothing
+    matches the full text: those rechecks are the expensive part and
+    mostly find the same rows.
+    """
+    pool = get_read_pool()
+    if not pool:
+        raise HTTPException(status_code=500, detail="DB pool not initialized")
+
+    args = [query]
+    conditions = []
+
+    def bind(value) -> str:
+        args.append(value)
+        return f"${len(args)}"
+
+    if status is not None:
+        conditions.append(STATUS_CONDITIONS[status])
+    if category is not None:
+        conditions.append(f"category = {bind(category)}")
+    filters = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    after = ""
+    if cursor is not None:
+        after = f"WHERE (rank, id) < ({bind(cursor[0])}::real, {bind(cursor[1])})"
+
+    async with pool.acquire() as conn:
+        records = await conn.fetch(
+            f"""
+            WITH matches AS MATERIALIZED (
+                SELECT
+                    id, title,
+                    COALESCE(image_variants->>'thumb', image_path) AS image_path,
+                    start_at, end_at, status, category,
+                    (
+                        ts_rank(search_vector, websearch_to_tsquery('simple', $1))
+                        + word_similarity($1, title)
+                    )::real AS rank
+                FROM activities
+                JOIN (
+                    SELECT id FROM activities
+                    WHERE search_vector @@ websearch_to_tsquery('simple', $1)
+                    UNION
+                    SELECT id FROM activities WHERE $1 <% title
+                    UNION
+                    SELECT id FROM activities WHERE $1 <% location_text
+                    UNION
+                    SELECT id FROM activities
+                    WHERE $1 <% description
+                    AND NOT EXISTS (
+                        SELECT 1 FROM activities
+                        WHERE search_vector @@ websearch_to_tsquery('simple', $1)
+                    )
+                ) AS candidates USING (id)
+                {filters}
+            )
+            SELECT * FROM matches
+            {after}
+            ORDER BY rank DESC, id DESC
+            LIMIT {bind(limit + 1)}
+            """,
+            *args,
+        )
+    return [dict(record) for record in records]
+
+
+async def get_activity_dates(activity_id: str) -> dict | None:
     """
     Retrieves start_at and end_at for a single activity by its ID.
     """
+    pool = get_pool()
+    if not pool:
+        raise HTTPException(status_code=500, detail="DB pool not initialized")
 
-    response = (
-        supabase.table("activities")
-        .select("start_at, end_at")
-        .eq("id", activity_id)
-        .execute()
-    )
+    async with pool.acquire() as conn:
+        record = await conn.fetchrow(
+            "SELECT start_at, end_at FROM activities WHERE id = $1", activity_id
+        )
 
-    if not response.data:
+    if not record:
         return None
 
-    return response.data[0]
+    return dict(record)
+
+
+def _to_db_value(column: str, value):
+    # update_data comes from model_dump(mode="json"), asyncpg wants datetimes
+    if column in ("start_at", "end_at", "updated_at") and isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
 
 
 async def update_activity(
-    activity_id: str, update_data: dict, image_file: UploadFile | None
+    activity_id: str, update_data: dict, image_file: StreamedUpload | None
 ) -> ActivityUpdateForm:
     """
     Updates an activity in the database.
     """
+    pool = get_pool()
+    if not pool:
+        raise HTTPException(status_code=500, detail="DB pool not initialized")
+
     hasCategory = True if "category" in update_data else False
     hasTitle = True if "title" in update_data else False
 
@@ -116,44 +361,71 @@ async def update_activity(
 
         if not hasCategory:
             # fetch a category
-            catagory_old = (
-                supabase.table("activities")
-                .select("category")
-                .eq("id", activity_id)
-                .execute()
-            )
+            async with pool.acquire() as conn:
+                catagory_old = await conn.fetchval(
+                    "SELECT category FROM activities WHERE id = $1", activity_id
+                )
 
         update_data["category"] = (
-            update_data["category"] if hasCategory else catagory_old.data[0]["category"]
+            update_data["category"] if hasCategory else catagory_old
         )
         update_data["title"] = update_data["title"] if hasTitle else image_file.filename
 
         # create a new one
-        img_public_url = await upload_activity_image(
+        uploaded = await upload_activity_image(
             update_data["category"],
             update_data["title"],
             image_file,
             image_file.filename,
         )
-        update_data["image_path"] = img_public_url
+        update_data["image_path"] = uploaded["image_path"]
+        update_data["image_variants"] = uploaded["image_variants"]
 
         if hasCategory:
-            move_activity_image(activity_id, update_data["category"])
+            await move_activity_image(activity_id, update_data["category"])
 
     if hasCategory and (not image_file):
-        move_activity_image(activity_id, update_data["category"])
+        await move_activity_image(activity_id, update_data["category"])
+
+    if "image_path" in update_data and not image_file:
+        # An image set by URL has no variants, drop those of the old image
+        update_data["image_variants"] = None
 
-    update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
-    response = (
-        supabase.table("activities").update(update_data).eq("id", activity_id).execute()
+    update_data["updated_at"] = datetime.now(timezone.utc)
+
+    columns = [column for column in update_data if column in UPDATABLE_COLUMNS]
+    assignments = ", ".join(
+        f"{column} = ${index}" for index, column in enumerate(columns, start=2)
     )
+    async with pool.acquire() as conn:
+        record = await conn.fetchrow(
+            f"UPDATE activities SET {assignments} WHERE id = $1 RETURNING *",
+            activity_id,
+            *[_to_db_value(column, update_data[column]) for column in columns],
+        )
+
+    invalidate_activities()
+    await invalidate_enrolled_students(activity_id)
+
+    return dict(record)
+
+
+async def delete_activity(id):
+    pool = get_pool()
+    if not pool:
+        raise HTTPException(status_code=500, detail="DB pool not initialized")
 
-    return response.data[0]
+    await delete_activity_image(id)
+    # Enrollments go with the activity, look them up first but only
+    # invalidate once the delete has committed
+    student_ids = await get_enrolled_student_ids(id)
+    async with pool.acquire() as conn:
+        records = await conn.fetch("DELETE FROM activities WHERE id = $1 RETURNING *", id)
 
+    invalidate_activities()
+    for student_id in student_ids:
+        invalidate_student_schedule(student_id)
 
-def delete_activity(id):
-    delete_activity_image(id)
-    response = supabase.table("activities").delete().eq("id", id).execute()
-    if not response.data:
+    if not records:
         return []
-    return response.data
+    return [dict(record) for record in records]
@@ -0,0 +1,211 @@
+import datetime
+from typing import Iterable, List, Mapping
+
+import asyncpg
+
+from utils.recurrence import meeting_dates
+
+CLASS_OCCURRENCE_COLUMNS = [
+    "class_meeting_id",
+    "class_date",
+    "student_id",
+    "student_class_id",
+    "class_code",
+    "class_name",
+    "start_time",
+    "end_time",
+]
+
+# Meetings with their class details, the input of occurrence_records
+LIVE_MEETINGS_QUERY = """
+    SELECT
+        cm.id,
+        cm.student_class_id,
+        cm.weekday,
+        cm.start_time,
+        cm.end_time,
+        cm.repeat_rule,
+        sc.student_id,
+        sc.class_code,
+        sc.class_name,
+        sc.class_start_date,
+        sc.class_end_date
+    FROM
+        class_meetings AS cm
+    JOIN
+        student_classes AS sc ON cm.student_class_id = sc.id
+    WHERE
+        ($1::uuid IS NULL OR sc.student_id = $1)
+"""
+
+LIVE_CANCELLATIONS_QUERY = """
+    SELECT
+        cc.class_meeting_id,
+        cc.cancellation_date
+    FROM
+        class_cancellations AS cc
+    JOIN
+        class_meetings AS cm ON cc.class_meeting_id = cm.id
+    JOIN
+        student_classes AS sc ON cm.student_class_id = sc.id
+    WHERE
+        ($1::uuid IS NULL OR sc.student_id = $1)
+"""
+
+
+def occurrence_records(
+    meetings: Iterable[Mapping], cancelled: set[tuple] = frozenset()
+) -> List[tuple]:
+    """
+    Expands meetings over their whole class range into class_occurrences
+    rows (CLASS_OCCURRENCE_COLUMNS order), skipping cancelled dates.
+    """
+    records = []
+    for meeting in meetings:
+        for class_date in meeting_dates(
+            meeting["weekday"],
+            meeting["repeat_rule"],
+            meeting["class_start_date"],
+            meeting["class_end_date"],
+            meeting["class_start_date"],
+            meeting["class_end_date"],
+        ):
+            if (meeting["id"], class_date) in cancelled:
+                continue
+            records.append(
+                (
+                    meeting["id"],
+                    class_date,
+                    meeting["student_id"],
+                    meeting["student_class_id"],
+                    meeting["class_code"],
+                    meeting["class_name"],
+                    meeting["start_time"],
+                    meeting["end_time"],
+                )
+            )
+    return records
+
+
+async def insert_occurrences(conn: asyncpg.Connection, records: List[tuple]) -> None:
+    if records:
+        await conn.copy_records_to_table(
+            "class_occurrences", records=records, columns=CLASS_OCCURRENCE_COLUMNS
+        )
+
+
+async def delete_occurrence(
+    conn: asyncpg.Connection, class_meeting_id, class_date: datetime.date
+) -> None:
+    await conn.execute(
+        """
+        DELETE FROM class_occurrences
+        WHERE class_meeting_id = $1 AND class_date = $2
+        """,
+        class_meeting_id,
+        class_date,
+    )
+
+
+async def delete_occurrences(
+    conn: asyncpg.Connection, class_meeting_ids: List, class_dates: List[datetime.date]
+) -> None:
+    """Set-based delete_occurrence for parallel lists of meeting ids and dates."""
+    await conn.execute(
+        """
+        DELETE FROM class_occurrences AS co
+        USING unnest($1::uuid[], $2::date[]) AS cancelled(class_meeting_id, class_date)
+        WHERE co.class_meeting_id = cancelled.class_meeting_id
+          AND co.class_date = cancelled.class_date
+        """,
+        class_meeting_ids,
+        class_dates,
+    )
+
+
+async def fetch_live_occurrences(conn: asyncpg.Connection, student_id=None) -> List[tuple]:
+    """Occurrences computed from the live meetings and cancellations."""
+    meetings = await conn.fetch(LIVE_MEETINGS_QUERY, student_id)
+    cancellations = await conn.fetch(LIVE_CANCELLATIONS_QUERY, student_id)
+    cancelled = {
+        (record["class_meeting_id"], record["cancellation_date"])
+        for record in cancellations
+    }
+    return occurrence_records(meetings, cancelled)
+
+
+async def fetch_materialized_occurrences(
+    conn: asyncpg.Connection, student_id=None
+) -> List[asyncpg.Record]:
+    return await conn.fetch(
+        f"""
+        SELECT {", ".join(CLASS_OCCURRENCE_COLUMNS)}
+        FROM class_occurrences
+        WHERE ($1::uuid IS NULL OR student_id = $1)
+        """,
+        student_id,
+    )
+
+
+async def rebuild_occurrences(conn: asyncpg.Connection, student_id=None) -> int:
+    """
+    Replaces the materialized rows (of one student, or everyone) with the
+    live expansion in a single transaction. Returns the number of rows written.
+    """
+    async with conn.transaction():
+        records = await fetch_live_occurrences(conn, student_id)
+        await conn.execute(
+            "DELETE FROM class_occurrences WHERE ($1::uuid IS NULL OR student_id = $1)",
+            student_id,
+        )
+        await insert_occurrences(conn, records)
+    return len(records)
+
+
+async def get_materialized_daily_classes(
+    conn: asyncpg.Connection, student_id, class_date: datetime.date
+) -> List[asyncpg.Record]:
+    return await conn.fetch(
+        """
+        SELECT class_code, class_name, start_time, end_time
+        FROM class_occurrences AS co
+        WHERE student_id = $1 AND class_date = $2
+          AND NOT EXISTS (
+              SELECT 1 FROM holidays AS h
+              WHERE co.class_date BETWEEN h.start_date AND h.end_date
+                AND (h.class_code IS NULL OR h.class_code = co.class_code)
+          )
+        ORDER BY start_time
+        """,
+        student_id,
+        class_date,
+    )
+
+
+async def get_materialized_classes_in_range(
+    conn: asyncpg.Connection,
+    student_id,
+    range_start: datetime.date,
+    range_end: datetime.date,
+) -> List[asyncpg.Record]:
+    return await conn.fetch(
+        """
+        SELECT
+            class_date::timestamp AS class_date,
+            class_code,
+            class_name,
+            start_time,
+            end_time
+        FROM class_occurrences AS co
+        WHERE student_id = $1 AND class_date BETWEEN $2 AND $3
+          AND NOT EXISTS (
+              SELECT 1 FROM holidays AS h
+              WHERE co.class_date BETWEEN h.start_date AND h.end_date
+                AND (h.class_code IS NULL OR h.class_code = co.class_code)
+          )
+        ORDER BY class_date, start_time
+        """,
+        student_id,
+        range_start,
+        range_end,
+    )
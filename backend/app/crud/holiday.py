@@ -0,0 +1,79 @@
+import datetime
+from typing import List
+import uuid
+
+import asyncpg
+from fastapi import HTTPException, status
+
+from db.base import get_pool, get_read_pool
+from schemas.holiday import HolidayIn
+from services.schedule_invalidation import invalidate_all_schedules
+
+
+async def get_holidays_between(
+    conn: asyncpg.Connection, range_start: datetime.date, range_end: datetime.date
+) -> List[asyncpg.Record]:
+    return await conn.fetch(
+        """
+        SELECT id, name, start_date, end_date, class_code
+        FROM holidays
+        WHERE start_date <= $2 AND end_date >= $1
+        ORDER BY start_date
+        """,
+        range_start,
+        range_end,
+    )
+
+
+async def list_holidays(
+    range_start: datetime.date, range_end: datetime.date
+) -> List[dict]:
+    pool = get_read_pool()
+    if not pool:
+        raise HTTPException(status_code=500, detail="DB pool not initialized")
+
+    async with pool.acquire() as conn:
+        records = await get_holidays_between(conn, range_start, range_end)
+    return [dict(record) for record in records]
+
+
+async def create_holiday(payload: HolidayIn, created_by) -> dict:
+    pool = get_pool()
+    if not pool:
+        raise HTTPException(status_code=500, detail="DB pool not initialized")
+
+    async with pool.acquire() as conn:
+        record = await conn.fetchrow(
+            """
+            INSERT INTO holidays (id, name, start_date, end_date, class_code, created_by)
+            VALUES ($1, $2, $3, $4, $5, $6)
+            RETURNING id, name, start_date, end_date, class_code
+            """,
+            uuid.uuid4(),
+            payload.name,
+            payload.start_date,
+            payload.end_date,
+            payload.class_code,
+            created_by,
+        )
+
+    invalidate_all_schedules()
+    return dict(record)
+
+
+async def delete_holiday(holiday_id: uuid.UUID) -> None:
+    pool = get_pool()
+    if not pool:
+        raise HTTPException(status_code=500, detail="DB pool not initialized")
+
+    async with pool.acquire() as conn:
+        deleted = await conn.fetchval(
+            "DELETE FROM holidays WHERE id = $1 RETURNING id", holiday_id
+        )
+
+    if not deleted:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Holiday not found"
+        )
+
+    invalidate_all_schedules()
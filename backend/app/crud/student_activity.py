@@ -3,11 +3,57 @@ from dateutil.relativedelta import relativedelta
 from typing import List
 from fastapi import HTTPException, status
 from schemas.student_activity import StudentActivityResponse
-from db.base import supabase
+from db.base import get_pool, get_read_pool
+from services.schedule_invalidation import invalidate_student_schedule
 from uuid import UUID, uuid4
 
+# Enrolled activities of a student overlapping [window_start, window_end)
+ENROLLED_ACTIVITIES_QUERY = """
+    SELECT
+        a.id::text AS id,
+        a.title,
+        a.start_at,
+        a.end_at
+    FROM
+        student_activities AS sa
+    JOIN
+        activities AS a ON a.id = sa.activity_id
+    WHERE
+        sa.student_id = $1
+        AND a.start_at < $2
+        AND a.end_at > $3
+    ORDER BY
+        a.start_at;
+"""
+
+
+async def _fetch_enrolled_activities(
+    user_id: UUID, window_start: datetime, window_end: datetime
+) -> List[StudentActivityResponse]:
+    pool = get_read_pool(user_id)
+    if not pool:
+        raise HTTPException(status_code=500, detail="DB pool not initialized")
+
+    async with pool.acquire() as conn:
+        records = await conn.fetch(
+            ENROLLED_ACTIVITIES_QUERY, str(user_id), window_end, window_start
+        )
+
+    return [StudentActivityResponse(**dict(record)) for record in records]
+
+
+async def get_activities_between(
+    user_id: UUID, range_start: date, range_end: date
+) -> List[StudentActivityResponse]:
+    """Enrolled activities overlapping range_start..range_end (both days inclusive)."""
+    window_start = datetime.combine(range_start, datetime.min.time(), tzinfo=timezone.utc)
+    window_end = datetime.combine(
+        range_end + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc
+    )
+    return await _fetch_enrolled_activities(user_id, window_start, window_end)
+
 
-def get_daily_activity(
+async def get_daily_activity(
     user_id: UUID, target_date: date
 ) -> List[StudentActivityResponse]:
 
@@ -15,29 +61,10 @@ def get_daily_activity(
 
     next_day_start = day_start + timedelta(days=1)
 
-    response = (
-        supabase.table("student_activities")
-        .select("activities(id, title, start_at, end_at)")
-        .eq("student_id", str(user_id))
-        .lt("activities.start_at", next_day_start.isoformat())
-        .gt("activities.end_at", day_start.isoformat())
-        .order("start_at", desc=False, foreign_table="activities")
-        .execute()
-    )
-
-    if not response.data:
-        return []
+    return await _fetch_enrolled_activities(user_id, day_start, next_day_start)
 
-    activities_list = []
-    for item in response.data:
-        activity_data = item.get("activities")
-        if activity_data:
-            # Validate and create the response object
-            activities_list.append(StudentActivityResponse(**activity_data))
-    return activities_list
 
-
-def get_monthly_activities_crud(
+async def get_monthly_activities_crud(
     user_id: UUID, target_date: date
 ) -> List[StudentActivityResponse]:
 
@@ -52,73 +79,87 @@ def get_monthly_activities_crud(
             datetime.min.time(),
             tzinfo=timezone.utc,
         )
-        
-    next_month_start = month_start + relativedelta(months=1)
-
-    response = (
-        supabase.table("student_activities")
-        .select("activities(id, title, start_at, end_at)")
-        .eq("student_id", str(user_id))
-        .lt("activities.start_at", next_month_start.isoformat())
-        .gt("activities.end_at", month_start.isoformat())
-        .order("start_at", desc=False, foreign_table="activities")
-        .execute()
-    )
 
-    if not response.data:
-        return []
+    next_month_start = month_start + relativedelta(months=1)
 
-    activities_list = []
-    for item in response.data:
-        activity_data = item.get("activities")
-        if activity_data:
-            activities_list.append(StudentActivityResponse(**activity_data))
-    return activities_list
+    return await _fetch_enrolled_activities(user_id, month_start, next_month_start)
 
 
-def create_student_activity(student_id: UUID, activity_id: UUID):
-    activity_check = (
-        supabase.table("activities")
-        .select("id")
-        .eq("id", str(activity_id))
-        .limit(1)
-        .execute()
-    )
+async def create_student_activity(student_id: UUID, activity_id: UUID):
+    pool = get_pool()
+    if not pool:
+        raise HTTPException(status_code=500, detail="DB pool not initialized")
 
-    if not activity_check.data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Activity not found"
+    async with pool.acquire() as conn:
+        activity_check = await conn.fetchval(
+            "SELECT 1 FROM activities WHERE id = $1", str(activity_id)
         )
 
-    existing_check = (
-        supabase.table("student_activities")
-        .select("id")
-        .eq("student_id", str(student_id))
-        .eq("activity_id", str(activity_id))
-        .limit(1)
-        .execute()
-    )
-
-    if existing_check.data:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="You have already added this activity",
+        if not activity_check:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Activity not found"
+            )
+
+        existing_check = await conn.fetchval(
+            """
+            SELECT 1 FROM student_activities
+            WHERE student_id = $1 AND activity_id = $2
+            LIMIT 1
+            """,
+            str(student_id),
+            str(activity_id),
         )
 
-    new_id = str(uuid4())
-    data_to_insert = {
-        "id": new_id,
-        "student_id": str(student_id),
-        "activity_id": str(activity_id),
-        "added_at": datetime.now(timezone.utc).isoformat(),
-    }
-
-    response = supabase.table("student_activities").insert(data_to_insert).execute()
+        if existing_check:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="You have already added this activity",
+            )
+
+        new_id = str(uuid4())
+        inserted = await conn.fetchval(
+            """
+            INSERT INTO student_activities (id, student_id, activity_id, added_at)
+            VALUES ($1, $2, $3, $4)
+            RETURNING id
+            """,
+            new_id,
+            str(student_id),
+            str(activity_id),
+            datetime.now(timezone.utc),
+        )
 
-    if not response.data:
+    if not inserted:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to add activity",
         )
 
+    invalidate_student_schedule(student_id)
+
     return new_id
+
+
+async def get_enrolled_student_ids(activity_id) -> list:
+    pool = get_pool()
+    if not pool:
+        raise HTTPException(status_code=500, detail="DB pool not initialized")
+
+    async with pool.acquire() as conn:
+        records = await conn.fetch(
+            "SELECT DISTINCT student_id FROM student_activities WHERE activity_id = $1",
+            str(activity_id),
+        )
+    return [record["student_id"] for record in records]
+
+
+async def invalidate_enrolled_students(activity_id) -> int:
+    """
+    Drops the cached schedules of every student enrolled in the activity.
+    Called after an activity is updated. Returns the number of students
+    invalidated.
+    """
+    student_ids = await get_enrolled_student_ids(activity_id)
+    for student_id in student_ids:
+        invalidate_student_schedule(student_id)
+    return len(student_ids)
@@ -4,8 +4,103 @@ import uuid
 import asyncpg
 from fastapi import HTTPException, status
 from schemas.auth import User
-from schemas.student_class import ClassCancellationIn, StudentClassIn
-from db.base import get_pool
+from schemas.student_class import (
+    BulkClassCancellationIn,
+    ClassCancellationIn,
+    StudentClassIn,
+)
+from core.config import CALENDAR_RANGE_MAX_DAYS, CLASS_EXPANSION_MODE
+from db.base import get_pool, get_read_pool, statement_cache_mode
+from crud.holiday import get_holidays_between
+from crud.class_occurrence import (
+    delete_occurrence,
+    delete_occurrences,
+    get_materialized_classes_in_range,
+    get_materialized_daily_classes,
+    insert_occurrences,
+    occurrence_records,
+)
+from services.schedule_invalidation import invalidate_student_schedule
+from utils.recurrence import expand_occurrences, meeting_dates
+
+
+async def get_class_schedule(
+    student_id, range_start: datetime.date, range_end: datetime.date
+) -> tuple[List[asyncpg.Record], set[tuple], List[asyncpg.Record]]:
+    """
+    Fetches the student's meetings of classes active in the range, the
+    cancelled (meeting id, date) pairs inside it and the holidays
+    overlapping it, in one round-trip each.
+    """
+    pool = get_read_pool(student_id)
+    if not pool:
+        raise HTTPException(status_code=500, detail="DB pool not initialized")
+
+    async with pool.acquire() as conn:
+        meetings = await conn.fetch(
+            """
+            SELECT
+                cm.id,
+                cm.weekday,
+                cm.start_time,
+                cm.end_time,
+                cm.repeat_rule,
+                sc.class_code,
+                sc.class_name,
+                sc.class_start_date,
+                sc.class_end_date
+            FROM
+                class_meetings AS cm
+            JOIN
+                student_classes AS sc ON cm.student_class_id = sc.id
+            WHERE
+                sc.student_id = $1
+                AND sc.class_start_date <= $3
+                AND sc.class_end_date >= $2
+            """,
+            student_id,
+            range_start,
+            range_end,
+        )
+        cancellations = await conn.fetch(
+            """
+            SELECT
+                cc.class_meeting_id,
+                cc.cancellation_date
+            FROM
+                class_cancellations AS cc
+            JOIN
+                class_meetings AS cm ON cc.class_meeting_id = cm.id
+            JOIN
+                student_classes AS sc ON cm.student_class_id = sc.id
+            WHERE
+                sc.student_id = $1
+                AND cc.cancellation_date BETWEEN $2 AND $3
+            """,
+            student_id,
+            range_start,
+            range_end,
+        )
+        holidays = await get_holidays_between(conn, range_start, range_end)
+
+    cancelled = {
+        (record["class_meeting_id"], record["cancellation_date"])
+        for record in cancellations
+    }
+    return meetings, cancelled, holidays
+
+
+async def get_classes_in_range(
+    current_user: User, range_start: datetime.date, range_end: datetime.date
+) -> List[dict]:
+    """
+    Class occurrences between range_start and range_end (inclusive), expanded
+    in Python so each meeting's repeat_rule is honoured.
+    """
+    meetings, cancelled, holidays = await get_class_schedule(
+        current_user.id, range_start, range_end
+    )
+    return expand_occurrences(meetings, cancelled, range_start, range_end, holidays)
 
 
 async def get_daily_classes(
@@ -15,10 +110,22 @@ async def get_daily_classes(
     Fetches today's classes for the currently authenticated student,
     excluding any cancelled classes.
     """
-    pool = get_pool()
+    if CLASS_EXPANSION_MODE == "python":
+        occurrences = await get_classes_in_range(current_user, today, today)
+        return [
+            {k: v for k, v in occurrence.items() if k != "class_date"}
+            for occurrence in occurrences
+        ]
+
+    # Read-only, served by the replica when one is configured
+    pool = get_read_pool(current_user.id)
     if not pool:
         raise HTTPException(status_code=500, detail="DB pool not initialized")
 
+    if CLASS_EXPANSION_MODE == "materialized":
+        async with pool.acquire() as conn:
+            return await get_materialized_daily_classes(conn, current_user.id, today)
+
     # Get today's date and weekday
     today = today
 
@@ -36,6 +143,8 @@ async def get_daily_classes(
     # 4. LEFT JOINs class_cancellations (cc) *only* for today's date.
     # 5. The key logic: `WHERE cc.id IS NULL` excludes any class that
     #    successfully found a cancellation entry.
+    # 6. NOT EXISTS drops classes on a holiday covering today (all classes,
+    #    or only the holiday's class_code).
 
     sql_query = """
         SELECT
@@ -56,18 +165,26 @@ async def get_daily_classes(
             AND cm.weekday = $3               -- today's weekday
             AND $1 BETWEEN sc.class_start_date AND sc.class_end_date -- class is active
             AND cc.id IS NULL               -- AND is NOT cancelled
+            AND NOT EXISTS (                -- AND is not a holiday
+                SELECT 1 FROM holidays AS h
+                WHERE $1 BETWEEN h.start_date AND h.end_date
+                  AND (h.class_code IS NULL OR h.class_code = sc.class_code)
+            )
         ORDER BY
             cm.start_time;
     """
 
+    if statement_cache_mode == "functions":
+        # Same query, planned once per connection inside the function
+        sql_query = "SELECT * FROM student_daily_classes($1, $2)"
+
     async with pool.acquire() as conn:
         try:
-            class_records = await conn.fetch(
-                sql_query,
-                today,
-                student_id,
-                today_weekday,
-            )
+            query_args = (today, student_id)
+            if statement_cache_mode != "functions":
+                query_args += (today_weekday,)
+
+            class_records = await conn.fetch(sql_query, *query_args)
             return class_records
 
         except Exception as e:
@@ -86,10 +203,6 @@ async def get_monthly_classes(
     currently authenticated student for the month of the provided date_in_month,
     excluding any cancelled classes.
     """
-    
-    pool = get_pool()
-    if not pool:
-        raise HTTPException(status_code=500, detail="DB pool not initialized")
 
     start_of_month = date_in_month.replace(day=1)
     
@@ -99,6 +212,31 @@ async def get_monthly_classes(
         next_month_start = date_in_month.replace(month=date_in_month.month + 1, day=1)
         
     end_of_month = next_month_start - datetime.timedelta(days=1)
+
+    return await get_classes_between(current_user, start_of_month, end_of_month)
+
+
+async def get_classes_between(
+    current_user: User, range_start: datetime.date, range_end: datetime.date
+) -> List[asyncpg.Record]:
+    """
+    Fetches every class instance between range_start and range_end (both
+    inclusive) in a single query, excluding any cancelled classes.
+    """
+
+    # Read-only, served by the replica when one is configured
+    pool = get_read_pool(current_user.id)
+    if not pool:
+        raise HTTPException(status_code=500, detail="DB pool not initialized")
+
+    if CLASS_EXPANSION_MODE == "python":
+        return await get_classes_in_range(current_user, range_start, range_end)
+
+    if CLASS_EXPANSION_MODE == "materialized":
+        async with pool.acquire() as conn:
+            return await get_materialized_classes_in_range(
+                conn, current_user.id, range_start, range_end
+            )
     
     student_id = current_user.id
 
@@ -124,16 +262,24 @@ async def get_monthly_classes(
             sc.student_id = $3
             AND dates.class_date BETWEEN sc.class_start_date AND sc.class_end_date
             AND cc.id IS NULL
+            AND NOT EXISTS (
+                SELECT 1 FROM holidays AS h
+                WHERE dates.class_date::date BETWEEN h.start_date AND h.end_date
+                  AND (h.class_code IS NULL OR h.class_code = sc.class_code)
+            )
         ORDER BY
             dates.class_date, cm.start_time;
     """
 
+    if statement_cache_mode == "functions":
+        sql_query = "SELECT * FROM student_monthly_classes($1, $2, $3)"
+
     async with pool.acquire() as conn:
         try:
             class_records = await conn.fetch(
                 sql_query,
-                start_of_month,
-                end_of_month, # Passed as the inclusive end date for generate_series
+                range_start,
+                range_end, # Passed as the inclusive end date for generate_series
                 student_id,
             )
             return class_records
@@ -188,24 +334,127 @@ async def create_student_class_crud(payload: StudentClassIn):
                 for m in payload.meetings
             ]
 
-            for mv in meetings_values:
-                await conn.execute(
-                    """
-                    INSERT INTO class_meetings
-                      (id, student_class_id, weekday, start_time, end_time, repeat_rule)
-                    VALUES ($1,$2,$3,$4,$5,$6)
-                    """,
-                    mv[0],
-                    mv[1],
-                    mv[2],
-                    mv[3],
-                    mv[4],
-                    mv[5],
+            await conn.executemany(
+                """
+                INSERT INTO class_meetings
+                  (id, student_class_id, weekday, start_time, end_time, repeat_rule)
+                VALUES ($1,$2,$3,$4,$5,$6)
+                """,
+                meetings_values,
+            )
+
+            if CLASS_EXPANSION_MODE == "materialized":
+                await insert_occurrences(
+                    conn, _payload_occurrence_records(payload, class_id, meetings_values)
                 )
 
+    invalidate_student_schedule(payload.student_id)
+
     return {"id": str(class_id), "message": "created"}
 
 
+def _payload_occurrence_records(
+    payload: StudentClassIn, class_id, meetings_values: List[tuple]
+) -> List[tuple]:
+    """class_occurrences rows of a class that is being inserted."""
+    return occurrence_records(
+        {
+            "id": meeting_id,
+            "student_class_id": class_id,
+            "weekday": weekday,
+            "start_time": start_time,
+            "end_time": end_time,
+            "repeat_rule": repeat_rule,
+            "student_id": payload.student_id,
+            "class_code": payload.class_code,
+            "class_name": payload.class_name,
+            "class_start_date": payload.class_start_date,
+            "class_end_date": payload.class_end_date,
+        }
+        for meeting_id, _, weekday, start_time, end_time, repeat_rule in meetings_values
+    )
+
+
+STUDENT_CLASS_COLUMNS = [
+    "id",
+    "student_id",
+    "class_code",
+    "class_name",
+    "class_start_date",
+    "class_end_date",
+    "location",
+    "section",
+    "notes",
+]
+
+CLASS_MEETING_COLUMNS = [
+    "id",
+    "student_class_id",
+    "weekday",
+    "start_time",
+    "end_time",
+    "repeat_rule",
+]
+
+
+async def bulk_create_student_classes_crud(payloads: List[StudentClassIn]) -> int:
+    """
+    Inserts many classes and their meetings in one transaction using COPY.
+    Either the whole chunk is written or nothing is. Returns the number of classes.
+    """
+    pool = get_pool()
+    if not pool:
+        raise HTTPException(status_code=500, detail="DB pool not initialized")
+
+    class_records = []
+    meeting_records = []
+    occurrence_rows = []
+    for payload in payloads:
+        class_id = uuid.uuid4()
+        class_records.append(
+            (
+                class_id,
+                payload.student_id,
+                payload.class_code,
+                payload.class_name,
+                payload.class_start_date,
+                payload.class_end_date,
+                payload.location,
+                payload.section,
+                payload.notes,
+            )
+        )
+        class_meetings = [
+            (uuid.uuid4(), class_id, m.weekday, m.start_time, m.end_time, m.repeat_rule)
+            for m in payload.meetings
+        ]
+        meeting_records.extend(class_meetings)
+        if CLASS_EXPANSION_MODE == "materialized":
+            occurrence_rows.extend(
+                _payload_occurrence_records(payload, class_id, class_meetings)
+            )
+
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            await conn.copy_records_to_table(
+                "student_classes",
+                records=class_records,
+                columns=STUDENT_CLASS_COLUMNS,
+            )
+            if meeting_records:
+                await conn.copy_records_to_table(
+                    "class_meetings",
+                    records=meeting_records,
+                    columns=CLASS_MEETING_COLUMNS,
+                )
+            await insert_occurrences(conn, occurrence_rows)
+
+    for student_id in {payload.student_id for payload in payloads}:
+        invalidate_student_schedule(student_id)
+
+    return len(class_records)
+
+
 async def cancel_student_class_crud(payload: ClassCancellationIn, current_user: User):
     pool = get_pool()
     if not pool:
@@ -260,11 +509,10 @@ async def cancel_student_class_crud(payload: ClassCancellationIn, current_user:
                     current_user.id,
                     payload.reason,
                 )
-                return {
-                    "id": cancellation_id,
-                    "message": "Class cancelled for the specified date",
-                }
-
+                if CLASS_EXPANSION_MODE == "materialized":
+                    await delete_occurrence(
+                        conn, payload.class_meeting_id, payload.cancellation_date
+                    )
             except asyncpg.exceptions.UniqueViolationError:
                 # This catches the unique constraint on (class_meeting_id, cancellation_date)
                 raise HTTPException(
@@ -278,3 +526,124 @@ async def cancel_student_class_crud(payload: ClassCancellationIn, current_user:
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Class meeting ID not found",
                 )
+
+    # After the commit, so a concurrent read cannot refill the cache from
+    # the state before the cancellation
+    invalidate_student_schedule(owner_id)
+    return {
+        "id": cancellation_id,
+        "message": "Class cancelled for the specified date",
+    }
+
+
+async def bulk_cancel_student_classes_crud(
+    payload: BulkClassCancellationIn, current_user: User
+) -> dict:
+    """
+    Cancels many (meeting, date) pairs at once: one query resolves and
+    authorizes the meetings, one INSERT ... SELECT writes every cancellation.
+    Dates that are already cancelled are skipped.
+    """
+    if (payload.end_date - payload.start_date).days + 1 > CALENDAR_RANGE_MAX_DAYS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Range is limited to {CALENDAR_RANGE_MAX_DAYS} days",
+        )
+
+    pool = get_pool()
+    if not pool:
+        raise HTTPException(status_code=500, detail="DB pool not initialized")
+
+    is_officer = current_user.role in ["officer", "admin"]
+    # Students may only cancel within their own classes
+    scope_student_id = None if is_officer else current_user.id
+    requested_ids = payload.class_meeting_ids or []
+
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            meetings = await conn.fetch(
+                """
+                SELECT
+                    cm.id, sc.student_id, cm.weekday, cm.repeat_rule,
+                    sc.class_start_date, sc.class_end_date
+                FROM class_meetings AS cm
+                JOIN student_classes AS sc ON cm.student_class_id = sc.id
+                WHERE (cm.id = ANY($1::uuid[]) OR sc.class_code = $2)
+                """,
+                requested_ids,
+                payload.class_code,
+            )
+
+            if requested_ids and len(meetings) < len(set(requested_ids)):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Class meeting not found",
+                )
+
+            if scope_student_id is not None:
+                if requested_ids and any(
+                    str(meeting["student_id"]) != str(scope_student_id)
+                    for meeting in meetings
+                ):
+                    raise HTTPException(
+                        status_code=status.HTTP_403_FORBIDDEN,
+                        detail="You do not have permission to cancel this class",
+                    )
+                meetings = [
+                    meeting
+                    for meeting in meetings
+                    if str(meeting["student_id"]) == str(scope_student_id)
+                ]
+
+            if not meetings:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="No class meetings match this request",
+                )
+
+            owner_by_meeting = {meeting["id"]: meeting["student_id"] for meeting in meetings}
+            # Candidate dates come from the same expansion as class_occurrences,
+            # so biweekly and RRULE meetings only get their real dates
+            meeting_ids, class_dates = [], []
+            for meeting in meetings:
+                for class_date in meeting_dates(
+                    meeting["weekday"],
+                    meeting["repeat_rule"],
+                    meeting["class_start_date"],
+                    meeting["class_end_date"],
+                    payload.start_date,
+                    payload.end_date,
+                ):
+                    meeting_ids.append(meeting["id"])
+                    class_dates.append(class_date)
+
+            inserted = await conn.fetch(
+                """
+                INSERT INTO class_cancellations
+                    (id, class_meeting_id, cancellation_date, created_by, reason)
+                SELECT gen_random_uuid(), dates.class_meeting_id, dates.class_date, $3, $4
+                FROM unnest($1::uuid[], $2::date[]) AS dates(class_meeting_id, class_date)
+                ON CONFLICT (class_meeting_id, cancellation_date) DO NOTHING
+                RETURNING class_meeting_id, cancellation_date
+                """,
+                meeting_ids,
+                class_dates,
+                current_user.id,
+                payload.reason,
+            )
+
+            if inserted and CLASS_EXPANSION_MODE == "materialized":
+                await delete_occurrences(
+                    conn,
+                    [record["class_meeting_id"] for record in inserted],
+                    [record["cancellation_date"] for record in inserted],
+                )
+
+    for student_id in {owner_by_meeting[record["class_meeting_id"]] for record in inserted}:
+        invalidate_student_schedule(student_id)
+
+    return {
+        "created": len(inserted),
+        "meetings": len(owner_by_meeting),
+        "message": f"Cancelled {len(inserted)} class meetings",
+    }
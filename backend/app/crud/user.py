@@ -1,25 +1,92 @@
-from db import supabase
+from types import SimpleNamespace
+from fastapi import HTTPException
+from db.base import get_pool
 from schemas.auth import UserRegister
+from core.config import USER_CACHE_MAX_SIZE, USER_CACHE_TTL_SECONDS
+from core.token_state import revoke_user_tokens
+from utils.cache import TTLCache
 
+# Public user rows (without password/created_at) keyed by username
+user_cache = TTLCache(maxsize=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS)
 
-def get_user(username: str):
-    return (
-        supabase.table("users")
-        .select("*")
-        .eq("username", username)
-        .execute()
-    )
 
+async def get_user(username: str):
+    """
+    Same shape as the supabase response it replaced: `.data` is the list of
+    matching rows.
+    """
+    pool = get_pool()
+    if not pool:
+        raise HTTPException(status_code=500, detail="DB pool not initialized")
 
-def create_user(user: UserRegister):
+    async with pool.acquire() as conn:
+        records = await conn.fetch(
+            "SELECT * FROM users WHERE username = $1", username
+        )
 
-    response = supabase.table("users").insert({
-            "username": user.username,
-            "password": user.password,
-            "first_name_th": user.first_name_th,
-            "last_name_th": user.last_name_th,
-            "is_active": True
-    }).execute()
+    return SimpleNamespace(data=[dict(record) for record in records])
 
-    return response.data  # returns the inserted row(s)
 
+async def get_cached_user(username: str) -> dict | None:
+    """
+    Returns the user row without sensitive columns, served from the
+    in-process cache when possible. Falls back to `get_user` on a miss.
+    """
+    user = user_cache.get(username)
+    if user is not None:
+        return user
+
+    rows = (await get_user(username)).data
+    if not rows:
+        return None
+
+    # Omit password and created_at, they are never needed after login
+    user = {k: v for k, v in rows[0].items() if k not in ["password", "created_at"]}
+    user_cache.set(username, user)
+    return user
+
+
+def invalidate_cached_user(username: str) -> None:
+    user_cache.invalidate(username)
+
+
+async def create_user(user: UserRegister):
+    pool = get_pool()
+    if not pool:
+        raise HTTPException(status_code=500, detail="DB pool not initialized")
+
+    async with pool.acquire() as conn:
+        records = await conn.fetch(
+            """
+            INSERT INTO users (username, password, first_name_th, last_name_th, is_active)
+            VALUES ($1, $2, $3, $4, TRUE)
+            RETURNING *
+            """,
+            user.username,
+            user.password,
+            user.first_name_th,
+            user.last_name_th,
+        )
+
+    invalidate_cached_user(user.username)
+
+    return [dict(record) for record in records]  # returns the inserted row(s)
+
+
+async def deactivate_user(username: str):
+    pool = get_pool()
+    if not pool:
+        raise HTTPException(status_code=500, detail="DB pool not initialized")
+
+    async with pool.acquire() as conn:
+        records = await conn.fetch(
+            "UPDATE users SET is_active = FALSE WHERE username = $1 RETURNING id",
+            username,
+        )
+
+    # Drop the cached row so the next request sees the inactive flag
+    invalidate_cached_user(username)
+    for record in records:
+        revoke_user_tokens(record["id"])
+
+    return [dict(record) for record in records]
@@ -1,8 +1,11 @@
 import asyncio
+import json
 import os
+import time
 import asyncpg
 from supabase import create_client, Client
 from dotenv import load_dotenv
+from db.pool_metrics import InstrumentedPool
 
 # Load .env file
 load_dotenv()
@@ -11,32 +14,187 @@ supabase_url: str = os.environ.get("SUPABASE_URL")
 supabase_key: str = os.environ.get("SUPABASE_KEY")
 database_url: str = os.environ.get("DATABASE_URL")
 
+# How prepared statements are reused:
+# - "none":      re-parse every query (safe behind the Supabase transaction pooler)
+# - "full":      asyncpg named statement cache (direct or session-pooled connections)
+# - "functions": hot calendar queries call server-side plpgsql functions whose
+#                plans Postgres caches per backend, works behind transaction pooling
+statement_cache_mode: str = os.environ.get("DB_STATEMENT_CACHE_MODE", "none")
+statement_cache_size: int = int(os.environ.get("DB_STATEMENT_CACHE_SIZE", "256"))
+
+pool_min_size: int = int(os.environ.get("DB_POOL_MIN_SIZE", "1"))
+pool_max_size: int = int(os.environ.get("DB_POOL_MAX_SIZE", "10"))
+
+# Record the stack of acquisitions held longer than the threshold (seconds)
+pool_track_leaks: bool = os.environ.get("DB_POOL_TRACK_LEAKS", "false").lower() == "true"
+pool_leak_threshold: float = float(os.environ.get("DB_POOL_LEAK_THRESHOLD", "5"))
+
+# Optional read replica for read-only calendar queries
+read_database_url: str | None = os.environ.get("READ_DATABASE_URL")
+read_replica_max_lag: float = float(os.environ.get("READ_REPLICA_MAX_LAG_SECONDS", "5"))
+read_replica_check_interval: float = float(
+    os.environ.get("READ_REPLICA_CHECK_INTERVAL_SECONDS", "10")
+)
+
 supabase: Client = create_client(supabase_url, supabase_key)
 
-pool: asyncpg.pool.Pool | None = None
+pool: InstrumentedPool | None = None
+read_pool: InstrumentedPool | None = None
+
+# Updated by replica_health_checker, reads only go to the replica while healthy
+read_replica_state = {"healthy": False, "lag_seconds": None, "last_error": None}
 
 
 def get_pool():
     return pool
 
 
+# Monotonic time of the last catalogue-wide write (activities, holidays),
+# which pins every read, and of the last write per student, which only
+# pins that student's reads. Both are set by pin_reads_to_primary.
+_last_write_at: float | None = None
+_student_write_at: dict[str, float] = {}
+
+
+def _pin_window() -> float:
+    # Lag was at most read_replica_max_lag at the last health check
+    return read_replica_max_lag + read_replica_check_interval
+
+
+def pin_reads_to_primary(student_id=None) -> None:
+    """
+    Called on every write that bumps a cache version or invalidates a cache.
+    For the next READ_REPLICA_MAX_LAG_SECONDS plus one health-check interval
+    the affected reads (the student's, or all of them without a student) go
+    to the primary, so a cache refilled (or an ETag answered) right after
+    the write cannot be filled from a replica that has not replayed it.
+    """
+    global _last_write_at
+    now = time.monotonic()
+    if student_id is None:
+        _last_write_at = now
+        return
+
+    _student_write_at[str(student_id)] = now
+    if len(_student_write_at) > 1024:
+        for key, written_at in list(_student_write_at.items()):
+            if now - written_at > _pin_window():
+                del _student_write_at[key]
+
+
+def get_read_pool(student_id=None):
+    """
+    Pool for read-only queries: the replica when it is up and within
+    READ_REPLICA_MAX_LAG_SECONDS of the primary, otherwise the primary.
+    Reads made shortly after a catalogue-wide write, or after a write to
+    `student_id`'s schedule, also go to the primary.
+    """
+    if not read_pool or not read_replica_state["healthy"]:
+        return pool
+
+    now = time.monotonic()
+    if _last_write_at is not None and now - _last_write_at <= _pin_window():
+        return pool
+    if student_id is not None:
+        written_at = _student_write_at.get(str(student_id))
+        if written_at is not None and now - written_at <= _pin_window():
+            return pool
+    return read_pool
+
+
+async def _init_connection(conn: asyncpg.Connection):
+    # Decode json/jsonb columns (e.g. activities.contact_info) into Python objects,
+    # the same shape the supabase client returned
+    for type_name in ("json", "jsonb"):
+        await conn.set_type_codec(
+            type_name, encoder=json.dumps, decoder=json.loads, schema="pg_catalog"
+        )
+
+
+def read_pool_stats() -> dict | None:
+    if not read_pool:
+        return None
+    return {**read_pool.stats(), **read_replica_state}
+
+
+async def _create_pool(dsn: str) -> InstrumentedPool:
+    raw_pool = await asyncpg.create_pool(
+        dsn,
+        min_size=pool_min_size,
+        max_size=pool_max_size,
+        statement_cache_size=(
+            statement_cache_size if statement_cache_mode == "full" else 0
+        ),
+        init=_init_connection,
+    )
+    return InstrumentedPool(
+        raw_pool, track_leaks=pool_track_leaks, leak_threshold=pool_leak_threshold
+    )
+
+
 async def init_db():
 
-    global pool
+    global pool, read_pool
     if pool:
         return
 
     if not database_url:
         raise RuntimeError("SUPABASE_DB_URL environment variable is not set")
 
-    pool = await asyncpg.create_pool(
-        database_url, min_size=1, max_size=10, statement_cache_size=0
-    )
+    pool = await _create_pool(database_url)
+
+    if read_database_url:
+        # The app still works without the replica, reads fall back to the primary
+        try:
+            read_pool = await _create_pool(read_database_url)
+            await check_read_replica()
+        except Exception as e:
+            print(f"Read replica unavailable, using primary for reads: {e}")
+
+
+async def check_read_replica():
+    """Measures replica lag and marks it healthy or not."""
+    if not read_pool:
+        return
+
+    try:
+        async with read_pool.acquire(timeout=2.0) as conn:
+            # 0 when the replica has replayed everything it received, NULL on a primary
+            lag = await conn.fetchval(
+                """
+                SELECT CASE
+                    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                    ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+                END
+                """
+            )
+        lag = float(lag or 0)
+        read_replica_state["lag_seconds"] = lag
+        read_replica_state["healthy"] = lag <= read_replica_max_lag
+        read_replica_state["last_error"] = None
+    except Exception as e:
+        read_replica_state["healthy"] = False
+        read_replica_state["last_error"] = str(e)
+
+
+async def replica_health_checker():
+    """Background task started from the app lifespan."""
+    while True:
+        await asyncio.sleep(read_replica_check_interval)
+        await check_read_replica()
 
 
 async def close_db():
     """Closes the database connection pool gracefully with a timeout."""
-    global pool
+    global pool, read_pool
+    if read_pool:
+        try:
+            await asyncio.wait_for(read_pool.close(), timeout=10.0)
+        except asyncio.TimeoutError:
+            print("Read replica pool close timed out (10s).")
+        finally:
+            read_pool = None
+
     if pool:
         print("Attempting to close database pool...")
         try:
@@ -47,5 +205,7 @@ async def close_db():
                 "Database pool close timed out (10s). "
                 "This indicates a connection leak (a connection was acquired but not released)."
             )
+            for held in pool.held_too_long():
+                print(f"Connection still held by {held['call_site']}")
         finally:
             pool = None
@@ -0,0 +1,114 @@
+from contextlib import asynccontextmanager
+import os
+import sys
+import time
+import traceback
+
+import asyncpg
+
+# Upper bounds (seconds) of the acquire wait histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, float("inf"))
+
+
+class InstrumentedPool:
+    """
+    Thin wrapper over an asyncpg pool that records how long callers wait for
+    a connection and how long each call site holds it.
+
+    With leak tracking enabled, the stack of every acquisition is kept while
+    the connection is held so long-held connections can be traced back.
+    """
+
+    def __init__(
+        self,
+        pool: asyncpg.pool.Pool,
+        track_leaks: bool = False,
+        leak_threshold: float = 5.0,
+    ):
+        self._pool = pool
+        self.track_leaks = track_leaks
+        self.leak_threshold = leak_threshold
+
+        self.acquire_count = 0
+        self.wait_buckets = [0] * len(WAIT_BUCKETS)
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.in_use = 0
+        # call site -> {"count", "total", "max"} hold durations in seconds
+        self.hold_by_site: dict[str, dict] = {}
+        # id -> (call site, acquired_at, stack) of connections currently held
+        self._held: dict[int, tuple[str, float, list[str] | None]] = {}
+        self._next_id = 0
+
+    def __getattr__(self, name):
+        # close(), get_size(), etc. go straight to the asyncpg pool
+        return getattr(self._pool, name)
+
+    def _record_wait(self, waited: float) -> None:
+        self.acquire_count += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        for index, bound in enumerate(WAIT_BUCKETS):
+            if waited <= bound:
+                self.wait_buckets[index] += 1
+                break
+
+    def _record_hold(self, site: str, held: float) -> None:
+        stats = self.hold_by_site.setdefault(
+            site, {"count": 0, "total": 0.0, "max": 0.0}
+        )
+        stats["count"] += 1
+        stats["total"] += held
+        stats["max"] = max(stats["max"], held)
+
+    @asynccontextmanager
+    async def acquire(self, timeout: float | None = None):
+        caller = sys._getframe(2).f_code
+        site = f"{os.path.basename(caller.co_filename)}:{caller.co_name}"
+        stack = traceback.format_stack(limit=12)[:-2] if self.track_leaks else None
+
+        started = time.perf_counter()
+        async with self._pool.acquire(timeout=timeout) as conn:
+            acquired_at = time.perf_counter()
+            self._record_wait(acquired_at - started)
+
+            held_id = self._next_id
+            self._next_id += 1
+            self._held[held_id] = (site, acquired_at, stack)
+            self.in_use += 1
+            try:
+                yield conn
+            finally:
+                self.in_use -= 1
+                del self._held[held_id]
+                self._record_hold(site, time.perf_counter() - acquired_at)
+
+    def held_too_long(self) -> list[dict]:
+        """Connections currently held for longer than leak_threshold."""
+        now = time.perf_counter()
+        return [
+            {"call_site": site, "held_seconds": now - acquired_at, "stack": stack}
+            for site, acquired_at, stack in self._held.values()
+            if now - acquired_at > self.leak_threshold
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "size": self._pool.get_size(),
+            "min_size": self._pool.get_min_size(),
+            "max_size": self._pool.get_max_size(),
+            "idle": self._pool.get_idle_size(),
+            "in_use": self.in_use,
+            "acquire_count": self.acquire_count,
+            "acquire_wait": {
+                "total": self.wait_total,
+                "max": self.wait_max,
+                "buckets": {
+                    str(bound): count
+                    for bound, count in zip(WAIT_BUCKETS, self.wait_buckets)
+                },
+            },
+            "hold_by_call_site": self.hold_by_site,
+            "leak_tracking": self.track_leaks,
+            "held_too_long": self.held_too_long(),
+        }
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import os
+import httpx
+
+supabase_url: str = os.environ.get("SUPABASE_URL")
+supabase_key: str = os.environ.get("SUPABASE_KEY")
+
+storage_max_connections: int = int(os.environ.get("STORAGE_HTTP_MAX_CONNECTIONS", "10"))
+storage_max_keepalive: int = int(os.environ.get("STORAGE_HTTP_MAX_KEEPALIVE", "5"))
+storage_keepalive_expiry: float = float(
+    os.environ.get("STORAGE_HTTP_KEEPALIVE_EXPIRY_SECONDS", "60")
+)
+storage_timeout: float = float(os.environ.get("STORAGE_HTTP_TIMEOUT_SECONDS", "30"))
+
+
+class StorageBucket:
+    """
+    Async counterpart of `supabase.storage.from_(bucket)` for the calls the
+    app makes, all sharing one pooled HTTP/2 client.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, bucket: str):
+        self._client = client
+        self.bucket = bucket
+
+    async def upload(self, path: str, file: bytes, content_type: str | None) -> None:
+        response = await self._client.post(
+            f"/object/{self.bucket}/{path}",
+            content=file,
+            headers={
+                "content-type": content_type or "application/octet-stream",
+                "x-upsert": "true",
+            },
+        )
+        response.raise_for_status()
+
+    async def download(self, path: str) -> bytes:
+        response = await self._client.get(f"/object/{self.bucket}/{path}")
+        response.raise_for_status()
+        return response.content
+
+    async def list(self, prefix: str) -> list[dict]:
+        response = await self._client.post(
+            f"/object/list/{self.bucket}",
+            json={"prefix": prefix, "limit": 100, "offset": 0},
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def remove(self, paths: list[str]) -> None:
+        response = await self._client.request(
+            "DELETE", f"/object/{self.bucket}", json={"prefixes": paths}
+        )
+        response.raise_for_status()
+
+    def get_public_url(self, path: str) -> str:
+        return f"{supabase_url}/storage/v1/object/public/{self.bucket}/{path}"
+
+
+storage_client: httpx.AsyncClient | None = None
+
+
+def get_storage(bucket: str = "media") -> StorageBucket:
+    if not storage_client:
+        raise RuntimeError("Storage client not initialized")
+    return StorageBucket(storage_client, bucket)
+
+
+async def init_storage():
+    global storage_client
+    if storage_client:
+        return
+
+    storage_client = httpx.AsyncClient(
+        base_url=f"{supabase_url}/storage/v1",
+        headers={
+            "apikey": supabase_key,
+            "authorization": f"Bearer {supabase_key}",
+        },
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=storage_max_connections,
+            max_keepalive_connections=storage_max_keepalive,
+            keepalive_expiry=storage_keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(storage_timeout),
+    )
+
+
+async def close_storage():
+    global storage_client
+    if storage_client:
+        await storage_client.aclose()
+        storage_client = None
@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -6,19 +7,49 @@ from api.v1.routes import (
     activity_router,
     student_class_router,
     student_activity_router,
-    calendar_router
+    calendar_router,
+    internal_router,
+    holiday_router,
 )
-from db.base import init_db, close_db
+from core.config import (
+    ACTIVITY_STATUS_INTERVAL_SECONDS,
+    MULTIPART_MAX_REQUEST_BYTES,
+    TOKEN_CLAIMS_MODE,
+    TOKEN_STATE_REFRESH_SECONDS,
+)
+from core.middleware import MultipartSizeLimitMiddleware
+from core.token_state import token_state_refresher
+from db.base import init_db, close_db, read_database_url, replica_health_checker
+from db.storage import init_storage, close_storage
+from services.activity_status import activity_status_scheduler
+from services.image_pipeline import shutdown_image_pool
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # startup
     await init_db()
+    await init_storage()
+
+    background_tasks = []
+    if TOKEN_CLAIMS_MODE == "claims":
+        background_tasks.append(
+            asyncio.create_task(token_state_refresher(TOKEN_STATE_REFRESH_SECONDS))
+        )
+    if read_database_url:
+        background_tasks.append(asyncio.create_task(replica_health_checker()))
+    if ACTIVITY_STATUS_INTERVAL_SECONDS > 0:
+        background_tasks.append(
+            asyncio.create_task(activity_status_scheduler(ACTIVITY_STATUS_INTERVAL_SECONDS))
+        )
     try:
         yield
     finally:
         # shutdown
+        for task in background_tasks:
+            task.cancel()
+        shutdown_image_pool()
+        await close_storage()
         await close_db()
 
 
@@ -26,6 +57,8 @@ app = FastAPI(lifespan=lifespan)
 
 origins = ["http://localhost:3000", "https://lifegear.vercel.app"]
 
+# Added first so it sits inside CORS and 413 responses still carry CORS headers
+app.add_middleware(MultipartSizeLimitMiddleware, max_bytes=MULTIPART_MAX_REQUEST_BYTES)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -46,6 +79,8 @@ app.include_router(
     tags=["student_activities"],
 )
 app.include_router(calendar_router, prefix="/api/v1/calendar", tags=["calendar"])
+app.include_router(internal_router, prefix="/api/v1/internal", tags=["internal"])
+app.include_router(holiday_router, prefix="/api/v1/holidays", tags=["holidays"])
 
 @app.get("/")
 def read_root():
@@ -53,13 +53,27 @@ class ActivityUpdateForm(BaseModel):
 class ActivityThumbnailResponse(BaseModel):
     id: UUID
     title: str
-    image_path: Optional[str] = None
+    image_path: Optional[str] = None  # The small variant when one exists
     start_at: datetime
     end_at: datetime
     status: ActivityStatus
     category: ActivityCategory
 
 
+class ActivityThumbnailPage(BaseModel):
+    items: List[ActivityThumbnailResponse]
+    next_cursor: Optional[str] = None  # None on the last page
+
+
+class ActivitySearchResult(ActivityThumbnailResponse):
+    rank: float
+
+
+class ActivitySearchPage(BaseModel):
+    items: List[ActivitySearchResult]
+    next_cursor: Optional[str] = None
+
+
 class ActivityResponse(BaseModel):
     id: UUID
     created_by: UUID
@@ -70,6 +84,7 @@ class ActivityResponse(BaseModel):
     location_text: Optional[str] = None
     contact_info: Optional[Dict[str, str]] = None
     image_path: Optional[str] = None
+    image_variants: Optional[Dict[str, str]] = None  # Resized copies by size name
     status: str
     category: str
     created_at: datetime
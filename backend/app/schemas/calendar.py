@@ -1,6 +1,6 @@
-from typing import List
+from typing import List, Literal, Optional
 from pydantic import BaseModel
-from datetime import date
+from datetime import date, datetime
 
 from schemas.student_class import MonthlyClassItem, StudentClassDaily
 from schemas.student_activity import StudentActivityResponse
@@ -10,7 +10,36 @@ class DailyScheduleResponse(BaseModel):
     date: date
     classes: List[StudentClassDaily]  # Using List[Any] as it matches your `[dict(record)...]`
     activities: List[StudentActivityResponse]
+    warnings: List[str] = []  # Sources that failed or timed out (partial result)
     
 class MonthlyScheduleResponse(BaseModel):
     classes: List[MonthlyClassItem]
-    activities: List[StudentActivityResponse]
\ No newline at end of file
+    activities: List[StudentActivityResponse]
+    warnings: List[str] = []
+
+
+class RangeScheduleResponse(BaseModel):
+    start_date: date
+    end_date: date
+    classes: List[MonthlyClassItem]
+    activities: List[StudentActivityResponse]
+    warnings: List[str] = []
+
+
+class ScheduleConflict(BaseModel):
+    kind: Literal["class", "activity"]
+    title: str
+    start: datetime
+    end: datetime
+    id: Optional[str] = None  # Activity id, classes have none
+
+
+class FreeSlot(BaseModel):
+    start: datetime
+    end: datetime
+
+
+class FreeSlotsResponse(BaseModel):
+    start_date: date
+    end_date: date
+    slots: List[FreeSlot]
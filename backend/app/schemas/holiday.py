@@ -0,0 +1,26 @@
+from datetime import date
+from typing import Optional
+import uuid
+
+from pydantic import BaseModel, model_validator
+
+
+class HolidayIn(BaseModel):
+    name: str
+    start_date: date
+    end_date: date
+    class_code: Optional[str] = None  # None applies to every class
+
+    @model_validator(mode="after")
+    def check_date_order(self):
+        if self.end_date < self.start_date:
+            raise ValueError("end_date must not be before start_date")
+        return self
+
+
+class HolidayResponse(BaseModel):
+    id: uuid.UUID
+    name: str
+    start_date: date
+    end_date: date
+    class_code: Optional[str] = None
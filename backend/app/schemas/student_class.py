@@ -2,7 +2,9 @@ from datetime import date, datetime, time
 from typing import List, Optional
 import uuid
 
-from pydantic import BaseModel, ConfigDict, Field, model_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+
+from utils.recurrence import parse_repeat_rule
 
 
 class ClassMeetingIn(BaseModel):
@@ -11,6 +13,18 @@ class ClassMeetingIn(BaseModel):
     end_time: time
     repeat_rule: Optional[str] = "weekly"
 
+    @field_validator("repeat_rule")
+    @classmethod
+    def check_repeat_rule(cls, value: Optional[str]):
+        try:
+            parse_repeat_rule(value, date(2000, 1, 3), date(2000, 12, 31))
+        except Exception:
+            raise ValueError(
+                "repeat_rule must be 'weekly', 'biweekly' or an RRULE such as "
+                "'FREQ=WEEKLY;INTERVAL=2;BYDAY=MO'"
+            )
+        return value
+
     @model_validator(mode="after")
     def check_time_order(self):
         if self.end_time <= self.start_time:
@@ -36,6 +50,27 @@ class ClassCancellationIn(BaseModel):
     reason: str | None = None
 
 
+class BulkClassCancellationIn(BaseModel):
+    """
+    Cancels every meeting of `class_code` (or of the listed meetings) on each
+    day between start_date and end_date, both inclusive, that it meets.
+    """
+
+    class_code: Optional[str] = None
+    class_meeting_ids: Optional[List[uuid.UUID]] = None
+    start_date: date
+    end_date: date
+    reason: str | None = None
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if (self.class_code is None) == (not self.class_meeting_ids):
+            raise ValueError("Give either class_code or class_meeting_ids")
+        if self.end_date < self.start_date:
+            raise ValueError("end_date must not be before start_date")
+        return self
+
+
 class StudentClassDaily(BaseModel):
     class_code: str
     class_name: str
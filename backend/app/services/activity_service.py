@@ -1,13 +1,33 @@
+import asyncio
 import mimetypes
-from fastapi import HTTPException, UploadFile
-from db.base import supabase
+from fastapi import HTTPException
+from db.base import get_pool
+from db.storage import get_storage
+from services.image_pipeline import render_image_variants
+from services.upload_stream import StreamedUpload
 
 from utils.string_utils import unique_activity_folder, unique_file_name
 
 
-def check_activity_exist(id: str) -> bool:
-    res = supabase.table("activities").select("id").eq("id", id).execute()
-    if res.data:
+async def _fetch_image_path(activity_id: str) -> str | None:
+    pool = get_pool()
+    if not pool:
+        raise HTTPException(status_code=500, detail="DB pool not initialized")
+
+    async with pool.acquire() as conn:
+        return await conn.fetchval(
+            "SELECT image_path FROM activities WHERE id = $1", activity_id
+        )
+
+
+async def check_activity_exist(id: str) -> bool:
+    pool = get_pool()
+    if not pool:
+        raise HTTPException(status_code=500, detail="DB pool not initialized")
+
+    async with pool.acquire() as conn:
+        found = await conn.fetchval("SELECT 1 FROM activities WHERE id = $1", id)
+    if found:
         return True
     return False
 
@@ -15,18 +35,24 @@ def check_activity_exist(id: str) -> bool:
 from fastapi import HTTPException
 
 
-def move_activity_image(activity_id: str, new_category: str) -> dict:
-    data = (
-        supabase.table("activities")
-        .select("image_path")
-        .eq("id", activity_id)
-        .execute()
-    )
+async def move_activity_image(activity_id: str, new_category: str) -> dict:
+    """
+    Moves every file in the activity's image folder (the original upload or
+    all its variants) under the new category and rewrites the stored URLs.
+    """
+    pool = get_pool()
+    if not pool:
+        raise HTTPException(status_code=500, detail="DB pool not initialized")
 
-    if not data.data:
-        return {"error": "Activity not found"}
+    async with pool.acquire() as conn:
+        record = await conn.fetchrow(
+            "SELECT image_path, image_variants FROM activities WHERE id = $1",
+            activity_id,
+        )
 
-    image_path_old_url = data.data[0]["image_path"]
+    if not record or not record["image_path"]:
+        return {"error": "Activity not found"}
+    image_path_old_url = record["image_path"]
 
     try:
         # The path in the bucket is the part of the URL after `/media/`
@@ -34,50 +60,54 @@ def move_activity_image(activity_id: str, new_category: str) -> dict:
 
         # Ensure no leading slash
         path_in_bucket = path_in_bucket.lstrip("/")
+        # path: activities/<category>/<activity_folder>/<filename>
+        old_folder = "/".join(path_in_bucket.split("/")[:-1])
+        activity_name = path_in_bucket.split("/")[-2]
     except IndexError:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to parse the image path from the URL: {image_path_old_url}",
         )
-    try:
-        file_content: bytes = supabase.storage.from_("media").download(path_in_bucket)
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to download image from path '{path_in_bucket}': {str(e)}",
+
+    new_folder = f"activities/{new_category}/{activity_name}"
+    media = get_storage("media")
+
+    async def copy_file(file_name: str) -> None:
+        file_content: bytes = await media.download(f"{old_folder}/{file_name}")
+        await media.upload(
+            f"{new_folder}/{file_name}",
+            file_content,
+            content_type=mimetypes.guess_type(file_name)[0],
         )
 
     try:
-        parts = path_in_bucket.split("/")
-        # path: activities/<category>/<activity_folder>/<filename>
-        activity_name = parts[-2]
-        file_name = parts[-1]
-    except IndexError:
+        file_names = [file["name"] for file in await media.list(old_folder)]
+        await asyncio.gather(*(copy_file(file_name) for file_name in file_names))
+    except Exception as e:
         raise HTTPException(
             status_code=500,
-            detail=f"Could not determine activity name and file name from path: {path_in_bucket}",
+            detail=f"Failed to copy images from '{old_folder}': {str(e)}",
         )
 
-    new_file_path = f"activities/{new_category}/{activity_name}/{file_name}"
-
-    # Image type
-    file_options = {
-        "content-type": mimetypes.guess_type(file_name)[0],
-        "upsert": "true",
-    }
-
-    supabase.storage.from_("media").upload(
-        path=new_file_path, file=file_content, file_options=file_options
-    )
-
-    # Update the database with the new public URL. Supabase client adds the leading slash for get_public_url.
-    img_public_url = supabase.storage.from_("media").get_public_url(new_file_path)
-    supabase.table("activities").update({"image_path": img_public_url}).eq(
-        "id", activity_id
-    ).execute()
+    # Update the database with the new public URLs
+    def moved(url: str) -> str:
+        return url.replace(f"/{old_folder}/", f"/{new_folder}/")
+
+    img_public_url = moved(image_path_old_url)
+    image_variants = record["image_variants"]
+    if image_variants:
+        image_variants = {name: moved(url) for name, url in image_variants.items()}
+
+    async with pool.acquire() as conn:
+        await conn.execute(
+            "UPDATE activities SET image_path = $1, image_variants = $2 WHERE id = $3",
+            img_public_url,
+            image_variants,
+            activity_id,
+        )
 
-    # Delete the old file
-    supabase.storage.from_("media").remove([path_in_bucket])
+    # Delete the old files
+    await media.remove([f"{old_folder}/{file_name}" for file_name in file_names])
     return {
         "message": "Image moved successfully.",
         "bucket": "media",
@@ -86,33 +116,44 @@ def move_activity_image(activity_id: str, new_category: str) -> dict:
 
 
 async def upload_activity_image(
-    category: str, activity_name: str, image_file: UploadFile, filename: str
-) -> str:
-    file_byte = await image_file.read()
+    category: str, activity_name: str, image_file: StreamedUpload, filename: str
+) -> dict:
+    """
+    Renders the picked image into resized, metadata-free variants and
+    uploads them concurrently. Returns {"image_path": full-size URL,
+    "image_variants": {"thumb" | "card" | "full" [+ "_jpg"]: URL}}.
+    """
+    variants = await render_image_variants(image_file.path)
+
     activity_clean = unique_activity_folder(activity_name)
-    file_name = unique_file_name(filename)
+    file_stem = unique_file_name(filename).rsplit(".", 1)[0]
+    folder = f"activities/{category}/{activity_clean}"
 
-    file_path = f"activities/{category}/{activity_clean}/{file_name}"
+    media = get_storage("media")
 
-    # File Type [jpeg jpg png] (Handle by Supabase)
-    file_options = {
-        "content-type": image_file.content_type,
-        "upsert": "true",
-    }
+    uploads = {}
+    for name, extension, content_type, data in variants:
+        key = name if extension == "webp" else f"{name}_{extension}"
+        uploads[key] = (f"{folder}/{file_stem}-{name}.{extension}", content_type, data)
 
-    # Upload file to supabase
-    # File limit at 5MB (Handle by Supabase)
-    supabase.storage.from_("media").upload(
-        path=file_path, file=file_byte, file_options=file_options
-    )
+    try:
+        await asyncio.gather(
+            *(
+                media.upload(path, data, content_type=content_type)
+                for path, content_type, data in uploads.values()
+            )
+        )
+    except Exception:
+        # Do not leave a partial set of variants behind
+        await media.remove([path for path, _, _ in uploads.values()])
+        raise
 
-    img_public_url = supabase.storage.from_("media").get_public_url(file_path)
-    return img_public_url
+    image_variants = {key: media.get_public_url(path) for key, (path, _, _) in uploads.items()}
+    return {"image_path": image_variants["full"], "image_variants": image_variants}
 
 
-def delete_activity_image(id: str):
-    data = supabase.table("activities").select("image_path").eq("id", id).execute()
-    image_path = data.data[0]["image_path"]
+async def delete_activity_image(id: str):
+    image_path = await _fetch_image_path(id)
 
     if not image_path:
         return
@@ -131,7 +172,8 @@ def delete_activity_image(id: str):
         )
     try:
         # List all files in the folder
-        files_to_delete = supabase.storage.from_("media").list(folder_path)
+        media = get_storage("media")
+        files_to_delete = await media.list(folder_path)
 
         if not files_to_delete:
             return
@@ -140,7 +182,7 @@ def delete_activity_image(id: str):
         file_paths = [f"{folder_path}/{file['name']}" for file in files_to_delete]
 
         # Remove all the files, and Supabase will automatically remove empty folder
-        supabase.storage.from_("media").remove(file_paths)
+        await media.remove(file_paths)
 
     except Exception as e:
         # print(f"Error deleting activity image folder for activity {id}: {e}")
@@ -0,0 +1,112 @@
+import asyncio
+from bisect import bisect_right
+from datetime import datetime, timezone
+
+from db.base import get_pool
+from schemas.enums import ActivityStatus
+from services.schedule_invalidation import invalidate_activities
+
+# Same rule as effective_status, applied to the stored column. `cancelled`
+# is set by officers and never changed here.
+ADVANCE_STATUSES_QUERY = """
+    UPDATE activities
+    SET
+        status = derived.status,
+        updated_at = now()
+    FROM (
+        SELECT
+            id,
+            CASE
+                WHEN now() < start_at THEN 'upcoming'
+                WHEN now() < end_at THEN 'running'
+                ELSE 'finished'
+            END AS status
+        FROM activities
+        WHERE status <> 'cancelled'
+    ) AS derived
+    WHERE activities.id = derived.id
+      AND activities.status IS DISTINCT FROM derived.status
+    RETURNING activities.id
+"""
+
+
+# status -> WHERE condition matching the activities that have it right now,
+# same rule as effective_status. Listings filter on this rather than the
+# stored column, which only catches up on the scheduler's next run.
+STATUS_CONDITIONS = {
+    ActivityStatus.cancelled.value: "status = 'cancelled'",
+    ActivityStatus.upcoming.value: "status <> 'cancelled' AND now() < start_at",
+    ActivityStatus.running.value: (
+        "status <> 'cancelled' AND start_at <= now() AND now() < end_at"
+    ),
+    ActivityStatus.finished.value: (
+        "status <> 'cancelled' AND start_at <= now() AND end_at <= now()"
+    ),
+}
+
+
+def effective_status(
+    status: str, start_at: datetime, end_at: datetime, now: datetime | None = None
+) -> str:
+    """The status an activity has right now, derived from its time window."""
+    if status == ActivityStatus.cancelled.value:
+        return status
+
+    now = now or datetime.now(timezone.utc)
+    if now < start_at:
+        return ActivityStatus.upcoming.value
+    if now < end_at:
+        return ActivityStatus.running.value
+    return ActivityStatus.finished.value
+
+
+def with_effective_status(activity: dict, now: datetime | None = None) -> dict:
+    """
+    Copy of an activity row with its status derived at read time. Rows may
+    come from the shared catalogue cache, so they are never modified in place.
+    """
+    if not activity:
+        return activity
+    return {
+        **activity,
+        "status": effective_status(
+            activity["status"], activity["start_at"], activity["end_at"], now
+        ),
+    }
+
+
+def status_epoch(boundaries: list[datetime], now: datetime | None = None) -> int:
+    """
+    How many of the sorted start/end times have passed. It changes exactly
+    when some activity's effective status does, so it goes into the ETag of
+    responses that carry derived statuses.
+    """
+    return bisect_right(boundaries, now or datetime.now(timezone.utc))
+
+
+async def advance_activity_statuses() -> int:
+    """
+    Brings every stored status in line with the clock in one UPDATE.
+    Returns the number of activities changed. Idempotent, so several
+    processes running it at once is harmless.
+    """
+    pool = get_pool()
+    if not pool:
+        return 0
+
+    async with pool.acquire() as conn:
+        changed = await conn.fetch(ADVANCE_STATUSES_QUERY)
+
+    if changed:
+        invalidate_activities()
+    return len(changed)
+
+
+async def activity_status_scheduler(interval: float):
+    """Background task started from the app lifespan."""
+    while True:
+        try:
+            await advance_activity_statuses()
+        except Exception as e:
+            print(f"Error advancing activity statuses: {e}")
+        await asyncio.sleep(interval)
@@ -1,16 +1,17 @@
 from crud.user import create_user, get_user
-from core.security import verify_password, get_hash_password
+from core.security import verify_password_async, get_hash_password_async
+from schemas.auth import UserRegister
 
-def authenticate_user(username: str, password: str):
-    user = get_user(username).data
+async def authenticate_user(username: str, password: str):
+    user = (await get_user(username)).data
     if not user:
         return False
-    if not verify_password(password, user[0]["password"]):
+    if not await verify_password_async(password, user[0]["password"]):
         return False
     
     return user[0]
 
-def register_student(username: int, password: str):
+async def register_student(username: str, password: str):
     # You might add checks here, e.g., if user already exists before calling create_user
-    hashed_password = get_hash_password(password)
-    return create_user(username, hashed_password)
\ No newline at end of file
+    hashed_password = await get_hash_password_async(password)
+    return await create_user(UserRegister(username=username, password=hashed_password))
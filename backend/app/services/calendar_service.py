@@ -0,0 +1,39 @@
+import asyncio
+from typing import Awaitable
+
+from core.config import CALENDAR_SOURCE_TIMEOUT_SECONDS
+
+
+async def _with_timeout(source: Awaitable, timeout: float):
+    return await asyncio.wait_for(source, timeout=timeout)
+
+
+async def gather_sources(
+    sources: dict[str, Awaitable], timeout: float = CALENDAR_SOURCE_TIMEOUT_SECONDS
+) -> tuple[dict, list[str]]:
+    """
+    Awaits every calendar source concurrently, each with its own timeout, so
+    the latency is the slowest source instead of the sum of all of them.
+
+    Returns the results by name (None for a failed source) and one warning
+    per source that failed or timed out.
+    """
+    names = list(sources)
+    outcomes = await asyncio.gather(
+        *(_with_timeout(sources[name], timeout) for name in names),
+        return_exceptions=True,
+    )
+
+    results = {}
+    warnings = []
+    for name, outcome in zip(names, outcomes):
+        if isinstance(outcome, asyncio.TimeoutError):
+            results[name] = None
+            warnings.append(f"Timed out fetching {name} after {timeout}s")
+        elif isinstance(outcome, Exception):
+            print(f"Error fetching {name}: {outcome}")
+            results[name] = None
+            warnings.append(f"Error fetching {name}")
+        else:
+            results[name] = outcome
+    return results, warnings
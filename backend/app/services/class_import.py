@@ -0,0 +1,198 @@
+from collections import deque
+import csv
+import time
+from typing import AsyncIterator
+
+from pydantic import ValidationError
+
+from core.config import CLASS_IMPORT_CHUNK_SIZE, CLASS_IMPORT_MAX_ERRORS
+from crud.student_class import (
+    bulk_create_student_classes_crud,
+    create_student_class_crud,
+)
+from schemas.student_class import ClassMeetingIn, StudentClassIn
+
+# CSV columns identifying one class, rows sharing them are meetings of that class
+CSV_CLASS_KEY = ("student_id", "class_code", "section", "class_start_date", "class_end_date")
+CSV_MEETING_FIELDS = ("weekday", "start_time", "end_time", "repeat_rule")
+
+
+async def _iter_lines(byte_chunks: AsyncIterator[bytes]):
+    """Yields (line_no, text) from a byte stream without buffering the whole body."""
+    buffer = b""
+    line_no = 0
+    async for chunk in byte_chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            yield line_no, line.decode("utf-8").rstrip("\r")
+    if buffer:
+        yield line_no + 1, buffer.decode("utf-8").rstrip("\r")
+
+
+async def _parse_ndjson(byte_chunks: AsyncIterator[bytes]):
+    """One StudentClassIn JSON object (with its meetings) per line."""
+    async for line_no, line in _iter_lines(byte_chunks):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, StudentClassIn.model_validate_json(line), None
+        except ValidationError as e:
+            yield line_no, None, e.errors(include_url=False, include_context=False)
+
+
+class _LineFeed:
+    """Line iterator for one csv.reader, filled as the body streams in."""
+
+    def __init__(self):
+        self.lines = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def _csv_rows(byte_chunks: AsyncIterator[bytes]):
+    """
+    Yields (line_no, row) with one csv.reader over the streamed lines, so
+    quoted fields may span lines. A record is only read once its quotes are
+    balanced; line_no is the line it starts on.
+    """
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    record_line = None
+    quotes = 0
+
+    async for line_no, line in _iter_lines(byte_chunks):
+        if record_line is None:
+            if not line.strip():
+                continue
+            record_line = line_no
+
+        feed.lines.append(line + "\n")
+        quotes += line.count('"')
+        if quotes % 2:
+            # Inside a quoted field that continues on the next line
+            continue
+
+        yield record_line, next(reader)
+        record_line = None
+        quotes = 0
+
+    if record_line is not None:
+        # Unterminated quote at the end of the body, let csv close the field
+        yield record_line, next(reader)
+
+
+def _build_csv_class(fields: dict, meetings: list[dict]) -> StudentClassIn:
+    return StudentClassIn(
+        **{k: v for k, v in fields.items() if k not in CSV_MEETING_FIELDS},
+        meetings=[ClassMeetingIn(**m) for m in meetings],
+    )
+
+
+async def _parse_csv(byte_chunks: AsyncIterator[bytes]):
+    """
+    One meeting per row. Consecutive rows with the same CSV_CLASS_KEY are
+    grouped into one class, reported under the line of its first row.
+    """
+    header = None
+    current_key = None
+    current_fields = None
+    current_line = 0
+    meetings: list[dict] = []
+
+    def flush():
+        try:
+            return current_line, _build_csv_class(current_fields, meetings), None
+        except ValidationError as e:
+            return current_line, None, e.errors(include_url=False, include_context=False)
+
+    async for line_no, row in _csv_rows(byte_chunks):
+        if header is None:
+            header = [column.strip() for column in row]
+            continue
+
+        # Empty cells become None so optional fields fall back to their defaults
+        fields = {
+            column: (value if value != "" else None)
+            for column, value in zip(header, row)
+        }
+        key = tuple(fields.get(column) for column in CSV_CLASS_KEY)
+
+        if key != current_key:
+            if current_fields is not None:
+                yield flush()
+            current_key = key
+            current_fields = fields
+            current_line = line_no
+            meetings = []
+
+        meeting = {
+            column: fields[column]
+            for column in CSV_MEETING_FIELDS
+            if fields.get(column) is not None
+        }
+        if meeting:
+            meetings.append(meeting)
+
+    if current_fields is not None:
+        yield flush()
+
+
+def _record_error(report: dict, line_no: int, error) -> None:
+    report["failed"] += 1
+    if len(report["errors"]) < CLASS_IMPORT_MAX_ERRORS:
+        report["errors"].append({"line": line_no, "error": error})
+
+
+async def _write_chunk(chunk: list[tuple[int, StudentClassIn]], report: dict) -> int:
+    try:
+        return await bulk_create_student_classes_crud([payload for _, payload in chunk])
+    except Exception:
+        # The COPY rolled back, retry one class per transaction to find the bad rows
+        created = 0
+        for line_no, payload in chunk:
+            try:
+                await create_student_class_crud(payload)
+                created += 1
+            except Exception as e:
+                _record_error(report, line_no, str(e))
+        return created
+
+
+async def import_student_classes(
+    byte_chunks: AsyncIterator[bytes], file_format: str
+) -> dict:
+    """
+    Streams classes from a CSV or NDJSON body and writes them in chunks of
+    CLASS_IMPORT_CHUNK_SIZE, one transaction per chunk.
+    """
+    parser = _parse_csv if file_format == "csv" else _parse_ndjson
+
+    started = time.perf_counter()
+    report = {"created": 0, "failed": 0, "errors": []}
+    chunk: list[tuple[int, StudentClassIn]] = []
+
+    async for line_no, payload, error in parser(byte_chunks):
+        if error is not None:
+            _record_error(report, line_no, error)
+            continue
+
+        chunk.append((line_no, payload))
+        if len(chunk) >= CLASS_IMPORT_CHUNK_SIZE:
+            report["created"] += await _write_chunk(chunk, report)
+            chunk = []
+
+    if chunk:
+        report["created"] += await _write_chunk(chunk, report)
+
+    elapsed = time.perf_counter() - started
+    report["elapsed_seconds"] = round(elapsed, 3)
+    report["rows_per_second"] = round(report["created"] / elapsed, 1) if elapsed else 0.0
+    return report
@@ -0,0 +1,70 @@
+"""
+Maintenance commands for the materialized class_occurrences table.
+
+Run from backend/app:
+
+    python -m services.class_occurrences rebuild [--student STUDENT_ID]
+    python -m services.class_occurrences check [--student STUDENT_ID]
+"""
+
+import argparse
+import asyncio
+
+from crud.class_occurrence import (
+    fetch_live_occurrences,
+    fetch_materialized_occurrences,
+    rebuild_occurrences,
+)
+from db.base import close_db, get_pool, init_db
+
+
+def _occurrence_key(record) -> tuple:
+    # Normalise uuid/str ids so rows from both sources compare equal
+    return tuple(str(value) for value in tuple(record))
+
+
+async def check_occurrences(conn, student_id=None) -> dict:
+    """
+    Compares the materialized rows against the live expansion of meetings
+    and cancellations. Empty `missing`/`unexpected` means they are consistent.
+    """
+    live = {_occurrence_key(record) for record in await fetch_live_occurrences(conn, student_id)}
+    materialized = {
+        _occurrence_key(record)
+        for record in await fetch_materialized_occurrences(conn, student_id)
+    }
+    return {
+        "live": len(live),
+        "materialized": len(materialized),
+        "missing": sorted(live - materialized),
+        "unexpected": sorted(materialized - live),
+    }
+
+
+async def main(command: str, student_id: str | None):
+    await init_db()
+    try:
+        async with get_pool().acquire() as conn:
+            if command == "rebuild":
+                written = await rebuild_occurrences(conn, student_id)
+                print(f"Rebuilt class_occurrences: {written} rows")
+            else:
+                report = await check_occurrences(conn, student_id)
+                print(
+                    f"live={report['live']} materialized={report['materialized']} "
+                    f"missing={len(report['missing'])} unexpected={len(report['unexpected'])}"
+                )
+                for row in report["missing"][:20]:
+                    print(f"missing:    {row}")
+                for row in report["unexpected"][:20]:
+                    print(f"unexpected: {row}")
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--student", dest="student_id", default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.command, args.student_id))
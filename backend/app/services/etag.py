@@ -0,0 +1,58 @@
+from collections import defaultdict
+import hashlib
+import time
+import uuid
+
+from fastapi import Request
+from core.config import ETAG_MAX_STALE_SECONDS
+
+# Versions live in process memory, the epoch keeps ETags from a previous
+# process (or another machine) from ever matching after a restart. Writes
+# handled by another machine do not bump the versions here, so every ETag
+# also carries a time bucket and stops matching within ETAG_MAX_STALE_SECONDS.
+_EPOCH = uuid.uuid4().hex[:8]
+_versions: dict[str, int] = defaultdict(int)
+
+# endpoint name -> {"requests", "not_modified"}
+etag_stats: dict[str, dict] = defaultdict(lambda: {"requests": 0, "not_modified": 0})
+
+CATALOGUE_VERSION_KEY = "activities"
+HOLIDAYS_VERSION_KEY = "holidays"
+
+
+def student_version_key(student_id) -> str:
+    return f"student:{student_id}"
+
+
+def bump_version(key: str) -> None:
+    _versions[key] += 1
+
+
+def get_version(key: str) -> int:
+    return _versions[key]
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag over the given parts, e.g. version counters and the requested date."""
+    bucket = int(time.time() // ETAG_MAX_STALE_SECONDS)
+    digest = hashlib.sha1(
+        "|".join([_EPOCH, str(bucket), *(str(part) for part in parts)]).encode()
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def is_not_modified(request: Request, etag: str, endpoint: str) -> bool:
+    """Checks If-None-Match against etag and records the hit rate per endpoint."""
+    stats = etag_stats[endpoint]
+    stats["requests"] += 1
+
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+
+    matched = if_none_match.strip() == "*" or etag in [
+        tag.strip() for tag in if_none_match.split(",")
+    ]
+    if matched:
+        stats["not_modified"] += 1
+    return matched
@@ -0,0 +1,213 @@
+from datetime import date, datetime, time, timedelta, timezone
+import hashlib
+
+import jwt
+from jwt.exceptions import InvalidTokenError
+
+from core.config import ALGORITHM, CALENDAR_TIMEZONE, SECRET_KEY
+from core.token_state import get_token_version, is_token_current
+from crud.student_activity import get_activities_between
+from crud.student_class import get_class_schedule
+from services.schedule_invalidation import ics_cache
+from utils.recurrence import (
+    SIMPLE_RULES,
+    first_weekday_on_or_after,
+    holiday_dates,
+    parse_repeat_rule,
+)
+
+ICS_TOKEN_SCOPE = "ics"
+
+# How far around today the feed reaches
+FEED_PAST_DAYS = 180
+FEED_FUTURE_DAYS = 365
+
+# student id -> (content digest, time that content was first built)
+_feed_modified: dict[str, tuple[str, datetime]] = {}
+
+
+async def create_ics_token(student_id) -> str:
+    """
+    Long-lived token embedded in the subscription URL, scoped to the feed only.
+    Carries the student's token_version, so deactivating the account or
+    bumping the version revokes it like any other token.
+    """
+    return jwt.encode(
+        {
+            "sub": str(student_id),
+            "scope": ICS_TOKEN_SCOPE,
+            "ver": await get_token_version(student_id),
+        },
+        SECRET_KEY,
+        algorithm=ALGORITHM,
+    )
+
+
+async def decode_ics_token(token: str) -> str | None:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except InvalidTokenError:
+        return None
+    if payload.get("scope") != ICS_TOKEN_SCOPE or "ver" not in payload:
+        return None
+    if not await is_token_current(payload.get("sub"), payload["ver"]):
+        return None
+    return payload.get("sub")
+
+
+def _escape(text: str | None) -> str:
+    return (
+        (text or "")
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold(line: str) -> list[str]:
+    """RFC 5545 lines are at most 75 octets, continuation lines start with a space."""
+    folded = []
+    encoded = line.encode("utf-8")
+    limit = 75
+    while len(encoded) > limit:
+        cut = limit
+        # Do not split a multi-byte character
+        while (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        folded.append(encoded[:cut].decode("utf-8"))
+        encoded = b" " + encoded[cut:]
+    folded.append(encoded.decode("utf-8"))
+    return folded
+
+
+def _local(day: date, at: time) -> str:
+    return datetime.combine(day, at).strftime("%Y%m%dT%H%M%S")
+
+
+def _utc(moment: datetime) -> str:
+    return moment.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _meeting_rrule(repeat_rule: str | None, class_end_date: date) -> tuple[str, list[str]]:
+    """Returns the RRULE value and any EXDATE dates (YYYYMMDD) carried in the rule."""
+    until = f"UNTIL={class_end_date:%Y%m%d}T235959Z"
+    rule = (repeat_rule or "").strip()
+    try:
+        parse_repeat_rule(rule, class_end_date, class_end_date)
+    except ValueError:
+        # Same fallback as utils.recurrence.parse_stored_rule
+        rule = "weekly"
+    if rule.lower() in SIMPLE_RULES:
+        return f"FREQ=WEEKLY;INTERVAL={SIMPLE_RULES[rule.lower()]};{until}", []
+
+    rrule_value = ""
+    exdates = []
+    for line in rule.splitlines():
+        name, _, value = line.partition(":") if ":" in line else ("RRULE", "", line)
+        if name.upper().startswith("EXDATE"):
+            exdates.extend(item[:8] for item in value.split(","))
+        else:
+            rrule_value = value
+    if "UNTIL=" not in rrule_value.upper() and "COUNT=" not in rrule_value.upper():
+        rrule_value = f"{rrule_value};{until}"
+    return rrule_value, exdates
+
+
+def build_ics(
+    meetings, cancelled: set[tuple], holidays, activities, generated_at: datetime
+) -> str:
+    stamp = _utc(generated_at)
+    tzid = f"TZID={CALENDAR_TIMEZONE}"
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//LifeGear//Schedule//EN",
+        "CALSCALE:GREGORIAN",
+        "X-WR-CALNAME:LifeGear",
+        f"X-WR-TIMEZONE:{CALENDAR_TIMEZONE}",
+    ]
+
+    holidays = list(holidays)
+    for meeting in meetings:
+        first_date = first_weekday_on_or_after(meeting["class_start_date"], meeting["weekday"])
+        if first_date > meeting["class_end_date"]:
+            continue
+
+        rrule_value, rule_exdates = _meeting_rrule(
+            meeting["repeat_rule"], meeting["class_end_date"]
+        )
+        start_time = meeting["start_time"]
+        exdates = sorted(
+            {
+                _local(cancellation_date, start_time)
+                for meeting_id, cancellation_date in cancelled
+                if meeting_id == meeting["id"]
+            }
+            | {_local(day, start_time) for day in holiday_dates(meeting, holidays)}
+            | {f"{day}T{start_time:%H%M%S}" for day in rule_exdates}
+        )
+
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:class-{meeting['id']}@lifegear",
+            f"DTSTAMP:{stamp}",
+            f"SUMMARY:{_escape(meeting['class_code'] + ' ' + meeting['class_name'])}",
+            f"DTSTART;{tzid}:{_local(first_date, start_time)}",
+            f"DTEND;{tzid}:{_local(first_date, meeting['end_time'])}",
+            f"RRULE:{rrule_value}",
+        ]
+        if exdates:
+            lines.append(f"EXDATE;{tzid}:{','.join(exdates)}")
+        lines.append("END:VEVENT")
+
+    for activity in activities:
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:activity-{activity.id}@lifegear",
+            f"DTSTAMP:{stamp}",
+            f"SUMMARY:{_escape(activity.title)}",
+            f"DTSTART:{_utc(activity.start_at)}",
+            f"DTEND:{_utc(activity.end_at)}",
+            "END:VEVENT",
+        ]
+
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(folded for line in lines for folded in _fold(line)) + "\r\n"
+
+
+async def get_ics_feed(student_id: str) -> dict:
+    """
+    Returns {"body", "etag", "last_modified"} for the student's feed, served
+    from ics_cache until it expires or a schedule write invalidates it.
+    """
+    cached = ics_cache.get(student_id)
+    if cached is not None:
+        return cached
+
+    today = date.today()
+    range_start = today - timedelta(days=FEED_PAST_DAYS)
+    range_end = today + timedelta(days=FEED_FUTURE_DAYS)
+
+    meetings, cancelled, holidays = await get_class_schedule(
+        student_id, range_start, range_end
+    )
+    activities = await get_activities_between(student_id, range_start, range_end)
+
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    body = build_ics(meetings, cancelled, holidays, activities, now)
+
+    # DTSTAMP changes on every build, leave it out of the ETag
+    digest = hashlib.sha256(
+        "\n".join(line for line in body.splitlines() if not line.startswith("DTSTAMP")).encode()
+    ).hexdigest()
+
+    # Last-Modified only moves when the content does, so If-Modified-Since
+    # clients keep getting 304s across cache expiries and rebuilds
+    previous = _feed_modified.get(student_id)
+    last_modified = previous[1] if previous and previous[0] == digest else now
+    _feed_modified[student_id] = (digest, last_modified)
+
+    feed = {"body": body, "etag": f'"{digest[:32]}"', "last_modified": last_modified}
+    ics_cache.set(student_id, feed)
+    return feed
@@ -0,0 +1,97 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException, status
+
+from core.config import (
+    IMAGE_JPEG_FALLBACK,
+    IMAGE_MAX_PIXELS,
+    IMAGE_WORKERS,
+)
+from utils.image_variants import UnsupportedImageError, render_file_variants
+
+_image_executor: ProcessPoolExecutor | None = None
+
+image_pool_stats = {
+    "workers": IMAGE_WORKERS,
+    "pending": 0,
+    "completed": 0,
+    "rejected": 0,
+    "pool_restarts": 0,
+    "seconds_total": 0.0,
+    "seconds_max": 0.0,
+    # Most bytes of one upload held in the web process at once while it
+    # streamed in (the received chunk plus parser buffers)
+    "upload_peak_buffer_bytes": 0,
+    "uploads_too_large": 0,
+    "uploads_bad_type": 0,
+    "worker_peak_rss_kib": 0,
+}
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _image_executor
+    if _image_executor is None:
+        # spawn: forking a process that already runs the event loop and
+        # the DB/HTTP pools' threads is not safe
+        _image_executor = ProcessPoolExecutor(
+            max_workers=IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _image_executor
+
+
+async def render_image_variants(path: str) -> list[tuple[str, str, str, bytes]]:
+    """
+    Decodes and resizes the upload at `path` (already type- and size-checked
+    while it streamed in, see services.upload_stream) on the process pool,
+    see utils.image_variants.render_variants. Raises 422 for files that are
+    not a decodable image and 503 if a worker died and took the pool down
+    with it.
+    """
+    formats = ("webp", "jpeg") if IMAGE_JPEG_FALLBACK else ("webp",)
+    loop = asyncio.get_running_loop()
+
+    executor = _get_executor()
+    image_pool_stats["pending"] += 1
+    started = time.perf_counter()
+    try:
+        variants, worker_peak_rss = await loop.run_in_executor(
+            executor, render_file_variants, path, formats, IMAGE_MAX_PIXELS
+        )
+        image_pool_stats["completed"] += 1
+        image_pool_stats["worker_peak_rss_kib"] = max(
+            image_pool_stats["worker_peak_rss_kib"], worker_peak_rss
+        )
+        return variants
+    except UnsupportedImageError as e:
+        image_pool_stats["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"File is not a supported image: {e}",
+        )
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory), which breaks the whole
+        # pool. Drop it so the next upload starts a fresh one, unless a
+        # concurrent request has already done so.
+        if _image_executor is executor:
+            shutdown_image_pool()
+            image_pool_stats["pool_restarts"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Image processing is temporarily unavailable, try again",
+        )
+    finally:
+        elapsed = time.perf_counter() - started
+        image_pool_stats["pending"] -= 1
+        image_pool_stats["seconds_total"] += elapsed
+        image_pool_stats["seconds_max"] = max(image_pool_stats["seconds_max"], elapsed)
+
+
+def shutdown_image_pool() -> None:
+    global _image_executor
+    if _image_executor is not None:
+        _image_executor.shutdown(wait=False, cancel_futures=True)
+        _image_executor = None
@@ -0,0 +1,99 @@
+import asyncio
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from core.config import CALENDAR_TIMEZONE
+from crud.student_activity import get_activities_between
+from crud.student_class import get_classes_between
+from schemas.auth import User
+from utils.intervals import Interval, IntervalTree, free_gaps
+
+LOCAL_TZ = ZoneInfo(CALENDAR_TIMEZONE)
+
+
+def _class_interval(item) -> Interval:
+    class_date = item["class_date"]
+    if isinstance(class_date, datetime):
+        class_date = class_date.date()
+    return Interval(
+        datetime.combine(class_date, item["start_time"], tzinfo=LOCAL_TZ),
+        datetime.combine(class_date, item["end_time"], tzinfo=LOCAL_TZ),
+        {
+            "kind": "class",
+            "title": f"{item['class_code']} {item['class_name']}",
+        },
+    )
+
+
+def _activity_interval(activity) -> Interval:
+    return Interval(
+        activity.start_at.astimezone(LOCAL_TZ),
+        activity.end_at.astimezone(LOCAL_TZ),
+        {"kind": "activity", "id": activity.id, "title": activity.title},
+    )
+
+
+async def get_busy_intervals(
+    current_user: User, range_start: date, range_end: date
+) -> IntervalTree:
+    """
+    The student's classes (cancellations already removed) and enrolled
+    activities between range_start and range_end, both inclusive. Only the
+    window is loaded, so the cost follows the window and not the number of
+    enrollments.
+    """
+    classes, activities = await asyncio.gather(
+        get_classes_between(current_user, range_start, range_end),
+        get_activities_between(current_user.id, range_start, range_end),
+    )
+    return IntervalTree(
+        [_class_interval(item) for item in classes]
+        + [_activity_interval(activity) for activity in activities]
+    )
+
+
+def _as_conflict(interval: Interval) -> dict:
+    return {**interval.data, "start": interval.start, "end": interval.end}
+
+
+async def find_conflicts(
+    current_user: User, start_at: datetime, end_at: datetime, exclude_activity_id=None
+) -> list[dict]:
+    """Everything on the student's schedule overlapping start_at..end_at."""
+    start_at = start_at.astimezone(LOCAL_TZ)
+    end_at = end_at.astimezone(LOCAL_TZ)
+    busy = await get_busy_intervals(current_user, start_at.date(), end_at.date())
+    return [
+        _as_conflict(interval)
+        for interval in busy.overlapping(start_at, end_at)
+        if exclude_activity_id is None
+        or interval.data.get("id") != str(exclude_activity_id)
+    ]
+
+
+async def find_free_slots(
+    current_user: User,
+    range_start: date,
+    range_end: date,
+    day_start: time,
+    day_end: time,
+    min_minutes: int,
+) -> list[dict]:
+    """
+    Gaps of at least min_minutes between day_start and day_end (local time)
+    on each day of the range.
+    """
+    busy = await get_busy_intervals(current_user, range_start, range_end)
+    min_length = timedelta(minutes=min_minutes)
+
+    slots = []
+    day = range_start
+    while day <= range_end:
+        window_start = datetime.combine(day, day_start, tzinfo=LOCAL_TZ)
+        window_end = datetime.combine(day, day_end, tzinfo=LOCAL_TZ)
+        for start, end in free_gaps(
+            busy.overlapping(window_start, window_end), window_start, window_end, min_length
+        ):
+            slots.append({"start": start, "end": end})
+        day += timedelta(days=1)
+    return slots
@@ -0,0 +1,73 @@
+from core.config import (
+    CATALOGUE_CACHE_MAX_SIZE,
+    CATALOGUE_CACHE_STALE_SECONDS,
+    CATALOGUE_CACHE_TTL_SECONDS,
+    ICS_CACHE_MAX_SIZE,
+    ICS_CACHE_TTL_SECONDS,
+    SCHEDULE_CACHE_MAX_SIZE,
+    SCHEDULE_CACHE_TTL_SECONDS,
+)
+from db.base import pin_reads_to_primary
+from services.etag import (
+    CATALOGUE_VERSION_KEY,
+    HOLIDAYS_VERSION_KEY,
+    bump_version,
+    get_version,
+    student_version_key,
+)
+from utils.cache import StaleWhileRevalidateCache, TTLCache
+
+# student id -> rendered ICS feed (body, etag, last_modified)
+ics_cache = TTLCache(maxsize=ICS_CACHE_MAX_SIZE, ttl=ICS_CACHE_TTL_SECONDS)
+
+# (student id, student version, "daily" | "monthly", date) -> assembled
+# schedule response. Bumping the student's version orphans their entries,
+# which then age out through the TTL and LRU instead of being scanned for.
+schedule_cache = TTLCache(
+    maxsize=SCHEDULE_CACHE_MAX_SIZE,
+    ttl=SCHEDULE_CACHE_TTL_SECONDS,
+    sizeof=lambda response: len(response.model_dump_json()),
+)
+
+# "thumbnails" -> thumbnail list, ("activity", id) -> activity row
+catalogue_cache = StaleWhileRevalidateCache(
+    maxsize=CATALOGUE_CACHE_MAX_SIZE,
+    ttl=CATALOGUE_CACHE_TTL_SECONDS,
+    stale_ttl=CATALOGUE_CACHE_STALE_SECONDS,
+)
+
+
+def schedule_cache_key(student_id, view: str, day) -> tuple:
+    student_id = str(student_id)
+    return (student_id, get_version(student_version_key(student_id)), view, day)
+
+
+def invalidate_student_schedule(student_id) -> None:
+    """
+    Called by every write that changes a student's schedule (class create,
+    cancellation, activity enrollment) to drop their cached views.
+    """
+    student_id = str(student_id)
+    ics_cache.invalidate(student_id)
+    bump_version(student_version_key(student_id))
+    pin_reads_to_primary(student_id)
+
+
+def invalidate_activities() -> None:
+    """
+    Called when an activity is created, updated or deleted. Drops the cached
+    catalogue and bumps its version, which is also part of every schedule ETag.
+    """
+    catalogue_cache.clear()
+    bump_version(CATALOGUE_VERSION_KEY)
+    pin_reads_to_primary()
+
+
+def invalidate_all_schedules() -> None:
+    """
+    Called when holidays change, which affects every student's classes.
+    """
+    ics_cache.clear()
+    schedule_cache.clear()
+    bump_version(HOLIDAYS_VERSION_KEY)
+    pin_reads_to_primary()
@@ -0,0 +1,265 @@
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+import os
+import tempfile
+from typing import AsyncIterator
+
+from fastapi import HTTPException, Request, status
+import python_multipart
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import parse_options_header
+from starlette.concurrency import run_in_threadpool
+
+from core.config import IMAGE_MAX_UPLOAD_BYTES
+from services.image_pipeline import image_pool_stats
+from utils.image_variants import sniff_image_type
+
+# Enough leading bytes for every signature sniff_image_type knows
+SNIFF_BYTES = 16
+# Non-file form fields (title, description, contact_info JSON, ...)
+MAX_FIELD_BYTES = 64 * 1024
+
+# Rejections happen before the rest of the body is read, so the connection
+# cannot be reused for another request
+_CLOSE = {"connection": "close"}
+
+
+@dataclass
+class StreamedUpload:
+    """An uploaded image, already type- and size-checked, in a temporary file."""
+
+    filename: str
+    content_type: str | None
+    path: str
+    size: int
+    # Most upload bytes the web process held at once while receiving it
+    peak_buffer_bytes: int
+
+
+class _FormStream:
+    """
+    python-multipart callbacks for one request. Field values are collected
+    in memory; the data of the `file_field` part goes straight to a
+    temporary file, with its magic number checked on the first bytes and
+    its size on every chunk.
+    """
+
+    def __init__(self, file_field: str):
+        self.file_field = file_field
+        self.fields: dict[str, str] = {}
+        self.upload: StreamedUpload | None = None
+        self._spool = None
+        self._head = b""
+
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._content_type: str | None = None
+        self._name = ""
+        self._is_file = False
+        self._in_upload = False
+        self._value = bytearray()
+        # File bytes received by the parser but not written yet
+        self._pending: list[bytes] = []
+        self._finished = False
+        self.upload_complete = False
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+    def on_part_begin(self) -> None:
+        self._disposition = b""
+        self._content_type = None
+        self._value = bytearray()
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        name = self._header_name.lower()
+        if name == b"content-disposition":
+            self._disposition = self._header_value
+        elif name == b"content-type":
+            self._content_type = self._header_value.decode("latin-1")
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        if b"name" not in options:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail='Form part without a Content-Disposition "name"',
+            )
+        self._name = options[b"name"].decode("utf-8", "replace")
+        self._is_file = b"filename" in options
+        # Only the first file under file_field is kept, other files are dropped
+        self._in_upload = self._is_file and self._name == self.file_field and self.upload is None
+        if self._in_upload:
+            self.upload = StreamedUpload(
+                filename=options[b"filename"].decode("utf-8", "replace"),
+                content_type=self._content_type,
+                path="",
+                size=0,
+                peak_buffer_bytes=0,
+            )
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if not self._is_file:
+            self._value += data[start:end]
+            if len(self._value) > MAX_FIELD_BYTES:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Form field {self._name!r} is larger than {MAX_FIELD_BYTES} bytes",
+                    headers=_CLOSE,
+                )
+        elif self._in_upload:
+            self._pending.append(data[start:end])
+
+    def on_part_end(self) -> None:
+        if not self._is_file:
+            self.fields[self._name] = self._value.decode("utf-8", "replace")
+        elif self._in_upload:
+            self._in_upload = False
+            self._finished = True
+
+    def buffered_bytes(self) -> int:
+        return (
+            sum(len(value) for value in self.fields.values())
+            + len(self._value)
+            + len(self._head)
+            + sum(len(chunk) for chunk in self._pending)
+        )
+
+    async def flush(self) -> None:
+        """Checks and writes the file bytes the last parser.write produced."""
+        pending, self._pending = self._pending, []
+        for chunk in pending:
+            await self._write(chunk)
+        if self._finished:
+            self._finished = False
+            await self._close_file()
+
+    async def _write(self, chunk: bytes) -> None:
+        upload = self.upload
+        upload.size += len(chunk)
+        if upload.size > IMAGE_MAX_UPLOAD_BYTES:
+            image_pool_stats["uploads_too_large"] += 1
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Image is larger than {IMAGE_MAX_UPLOAD_BYTES} bytes",
+                headers=_CLOSE,
+            )
+
+        if self._spool is None:
+            # Hold the first bytes back until there are enough to sniff
+            self._head += chunk
+            if len(self._head) < SNIFF_BYTES:
+                return
+            chunk, self._head = self._head, b""
+            self._check_type(chunk)
+            self._spool = tempfile.NamedTemporaryFile(prefix="upload-", delete=False)
+            upload.path = self._spool.name
+        await run_in_threadpool(self._spool.write, chunk)
+
+    def _check_type(self, head: bytes) -> None:
+        if sniff_image_type(head) is None:
+            image_pool_stats["uploads_bad_type"] += 1
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Image must be a JPEG, PNG or WebP file",
+                headers=_CLOSE,
+            )
+
+    async def _close_file(self) -> None:
+        if self._spool is None:
+            if not self._head:
+                # An empty file input: no image was picked
+                if not self.upload.filename:
+                    self.upload = None
+                    return
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Image is empty"
+                )
+            # Shorter than SNIFF_BYTES, still has to carry a signature
+            head, self._head = self._head, b""
+            self._check_type(head)
+            self._spool = tempfile.NamedTemporaryFile(prefix="upload-", delete=False)
+            self.upload.path = self._spool.name
+            await run_in_threadpool(self._spool.write, head)
+        await run_in_threadpool(self._spool.close)
+        self.upload_complete = True
+
+    async def discard(self) -> None:
+        if self._spool is not None:
+            await run_in_threadpool(self._spool.close)
+        if self.upload is not None and self.upload.path:
+            try:
+                os.remove(self.upload.path)
+            except FileNotFoundError:
+                pass
+
+
+@asynccontextmanager
+async def stream_form(
+    request: Request, file_field: str = "image_file"
+) -> AsyncIterator[tuple[dict[str, str], StreamedUpload | None]]:
+    """
+    Parses a multipart form as it arrives instead of letting Starlette spool
+    the whole body first. Yields the text fields and the upload under
+    `file_field` (None if there is none). The image is rejected with 415 on
+    its first bytes if it is not a JPEG, PNG or WebP and with 413 as soon as
+    it passes IMAGE_MAX_UPLOAD_BYTES, without reading the rest of the body.
+
+    Empty fields are left out, as FastAPI does for Form parameters. The
+    upload's temporary file is removed when the block exits. Bodies that are
+    not multipart (e.g. a urlencoded PATCH) go through request.form().
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data":
+        form = await request.form()
+        yield {key: value for key, value in form.items() if isinstance(value, str) and value}, None
+        return
+
+    if b"boundary" not in params:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Missing multipart boundary"
+        )
+
+    form = _FormStream(file_field)
+    parser = python_multipart.MultipartParser(params[b"boundary"], form.callbacks())
+    peak = 0
+    try:
+        try:
+            async for chunk in request.stream():
+                parser.write(chunk)
+                peak = max(peak, len(chunk) + form.buffered_bytes())
+                await form.flush()
+            parser.finalize()
+            await form.flush()
+        except MultipartParseError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        if form.upload is not None and not form.upload_complete:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Multipart body ended early"
+            )
+
+        if form.upload is not None:
+            form.upload.peak_buffer_bytes = peak
+            image_pool_stats["upload_peak_buffer_bytes"] = max(
+                image_pool_stats["upload_peak_buffer_bytes"], peak
+            )
+        yield {key: value for key, value in form.fields.items() if value}, form.upload
+    finally:
+        await form.discard()
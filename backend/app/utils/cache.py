@@ -0,0 +1,235 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Awaitable, Callable, Hashable
+
+import asyncio
+import time
+
+
+class TTLCache:
+    """
+    Small thread-safe LRU cache where every entry expires after `ttl` seconds.
+
+    Sync routes run in the AnyIO threadpool while async routes run on the
+    event loop, so all access goes through a lock.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+        sizeof: Callable[[Any], int] | None = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        # Optional estimate of an entry's size in bytes, reported by stats()
+        self._sizeof = sizeof
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._sizes: dict[Hashable, int] = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+
+    def _drop(self, key: Hashable) -> None:
+        # Caller holds the lock
+        self._data.pop(key, None)
+        self.bytes -= self._sizes.pop(key, 0)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                self._drop(key)
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        size = self._sizeof(value) if self._sizeof else 0
+        with self._lock:
+            self._drop(key)
+            self._data[key] = (self._clock() + self.ttl, value)
+            self._sizes[key] = size
+            self.bytes += size
+            while len(self._data) > self.maxsize:
+                self._drop(next(iter(self._data)))
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._drop(key)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drops every key matching predicate, returns how many were dropped."""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                self._drop(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "bytes": self.bytes,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class StaleWhileRevalidateCache:
+    """
+    LRU cache for async loaders. Entries are fresh for `ttl` seconds, then
+    served stale for up to `stale_ttl` more while a single background load
+    refreshes them. Concurrent misses on a key share one load.
+
+    Only used from the event loop, so unlike TTLCache it needs no lock.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        stale_ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        # Bumped by invalidation so loads started before it are not stored
+        self._generation = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.last_refresh_seconds: float | None = None
+        self._refresh_seconds_total = 0.0
+
+    async def get_or_load(
+        self, key: Hashable, loader: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        entry = self._data.get(key)
+        if entry is not None:
+            loaded_at, value = entry
+            age = self._clock() - loaded_at
+            if age < self.ttl:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self._data.move_to_end(key)
+                self.stale_hits += 1
+                if key not in self._inflight:
+                    self._start_load(key, loader)
+                return value
+            del self._data[key]
+
+        self.misses += 1
+        task = self._inflight.get(key) or self._start_load(key, loader)
+        # A cancelled request must not cancel the load other callers share
+        return await asyncio.shield(task)
+
+    def _start_load(self, key: Hashable, loader) -> asyncio.Task:
+        task = asyncio.ensure_future(self._load(key, loader, self._generation))
+        self._inflight[key] = task
+
+        def done(finished: asyncio.Task) -> None:
+            if self._inflight.get(key) is finished:
+                del self._inflight[key]
+            # Background refreshes have no awaiter, mark errors as retrieved
+            if not finished.cancelled():
+                finished.exception()
+
+        task.add_done_callback(done)
+        return task
+
+    async def _load(self, key: Hashable, loader, generation: int) -> Any:
+        started = time.perf_counter()
+        try:
+            value = await loader()
+        except Exception:
+            self.refresh_errors += 1
+            raise
+
+        duration = time.perf_counter() - started
+        self.refreshes += 1
+        self.last_refresh_seconds = duration
+        self._refresh_seconds_total += duration
+
+        if generation == self._generation:
+            self._data[key] = (self._clock(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+        self._inflight.pop(key, None)
+        self._generation += 1
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._inflight.clear()
+        self._generation += 1
+
+    def age(self, key: Hashable) -> float | None:
+        """Seconds since the key was loaded, None when not cached."""
+        entry = self._data.get(key)
+        return self._clock() - entry[0] if entry is not None else None
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        now = self._clock()
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "refreshing": len(self._inflight),
+            "last_refresh_seconds": self.last_refresh_seconds,
+            "avg_refresh_seconds": (
+                self._refresh_seconds_total / self.refreshes if self.refreshes else None
+            ),
+            "max_age_seconds": max(
+                (now - loaded_at for loaded_at, _ in self._data.values()), default=None
+            ),
+        }
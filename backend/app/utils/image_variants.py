@@ -0,0 +1,106 @@
+"""
+Image decoding and resizing for activity pictures. Runs in worker processes
+(see services.image_pipeline), so it only depends on Pillow.
+"""
+
+from io import BytesIO
+import resource
+
+from PIL import Image, ImageOps
+
+# Longest side in pixels, images are never upscaled
+VARIANT_SIZES = {"thumb": 320, "card": 800, "full": 1920}
+
+# format -> (Pillow format, content type, file extension, save options)
+OUTPUT_FORMATS = {
+    "webp": ("WEBP", "image/webp", "webp", {"quality": 80, "method": 4}),
+    "jpeg": (
+        "JPEG",
+        "image/jpeg",
+        "jpg",
+        {"quality": 82, "optimize": True, "progressive": True},
+    ),
+}
+
+
+class UnsupportedImageError(ValueError):
+    pass
+
+
+def sniff_image_type(head: bytes) -> str | None:
+    """Content type from the file's magic number, None if not an accepted image."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    """JPEG has no alpha channel, composite transparent images onto white."""
+    if image.mode in ("RGBA", "LA"):
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def render_variants(
+    source: bytes | str, formats: tuple[str, ...], max_pixels: int
+) -> list[tuple[str, str, str, bytes]]:
+    """
+    Decodes `source` (image bytes or a file path) once and returns
+    (variant, extension, content type, bytes) for every size in
+    VARIANT_SIZES and every format in `formats`. Output carries no
+    EXIF/ICC/XMP metadata; the EXIF orientation is applied first.
+    """
+    # Pillow only warns above MAX_IMAGE_PIXELS and raises above twice that,
+    # so the limit itself is enforced below from the header, before decoding
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    try:
+        image = Image.open(BytesIO(source) if isinstance(source, bytes) else source)
+        width, height = image.size
+        if width * height > max_pixels:
+            raise UnsupportedImageError(
+                f"Image is {width}x{height}, more than {max_pixels} pixels"
+            )
+        # Lets the JPEG decoder scale down by up to 8x while decoding
+        largest = max(VARIANT_SIZES.values())
+        image.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    except (Image.DecompressionBombError, OSError, SyntaxError, ValueError) as e:
+        raise UnsupportedImageError(str(e)) from e
+
+    has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+    image = image.convert("RGBA" if has_alpha else "RGB")
+
+    variants = []
+    # Largest first, each smaller size is resized from the previous one
+    source = image
+    for name, size in sorted(VARIANT_SIZES.items(), key=lambda item: -item[1]):
+        resized = source.copy()
+        resized.thumbnail((size, size), Image.Resampling.LANCZOS)
+        source = resized
+
+        for output_format in formats:
+            pillow_format, content_type, extension, options = OUTPUT_FORMATS[output_format]
+            encoded = _flatten(resized) if pillow_format == "JPEG" else resized
+            buffer = BytesIO()
+            encoded.save(buffer, pillow_format, **options)
+            variants.append((name, extension, content_type, buffer.getvalue()))
+
+    return variants
+
+
+def render_file_variants(
+    path: str, formats: tuple[str, ...], max_pixels: int
+) -> tuple[list[tuple[str, str, str, bytes]], int]:
+    """
+    render_variants for an image spooled to disk, so the web process neither
+    decodes it nor copies it again. Also returns the worker's peak RSS in KiB.
+    """
+    variants = render_variants(path, formats, max_pixels)
+    return variants, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
@@ -0,0 +1,104 @@
+from typing import Any, Iterable, NamedTuple
+
+
+class Interval(NamedTuple):
+    """Half-open [start, end) interval carrying an arbitrary payload."""
+
+    start: Any
+    end: Any
+    data: Any = None
+
+
+class _Node:
+    __slots__ = ("center", "by_start", "by_end", "left", "right")
+
+    def __init__(self, center, here: list[Interval], left, right):
+        self.center = center
+        # Every interval here contains center, so overlap tests only need
+        # one bound depending on which side of center the query falls.
+        self.by_start = sorted(here, key=lambda interval: interval.start)
+        self.by_end = sorted(here, key=lambda interval: interval.end, reverse=True)
+        self.left = left
+        self.right = right
+
+
+class IntervalTree:
+    """
+    Static centered interval tree. Built once in O(n log n), answers
+    overlap queries in O(log n + k) for k matches.
+    """
+
+    def __init__(self, intervals: Iterable[Interval]):
+        # Empty intervals never overlap anything
+        items = [interval for interval in intervals if interval.start < interval.end]
+        self._size = len(items)
+        self._root = self._build(sorted(items, key=lambda interval: interval.start))
+
+    def _build(self, items: list[Interval]):
+        if not items:
+            return None
+
+        # The middle interval's start always lands in `here`, so each level
+        # shrinks and the recursion terminates.
+        center = items[len(items) // 2].start
+        left, here, right = [], [], []
+        for interval in items:
+            if interval.end <= center:
+                left.append(interval)
+            elif interval.start > center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        return _Node(center, here, self._build(left), self._build(right))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def overlapping(self, start, end) -> list[Interval]:
+        """Intervals overlapping [start, end), ordered by start."""
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+
+            if end <= node.center:
+                for interval in node.by_start:
+                    if interval.start >= end:
+                        break
+                    found.append(interval)
+                stack.append(node.left)
+            elif start > node.center:
+                for interval in node.by_end:
+                    if interval.end <= start:
+                        break
+                    found.append(interval)
+                stack.append(node.right)
+            else:
+                found.extend(node.by_start)
+                stack.append(node.left)
+                stack.append(node.right)
+
+        found.sort(key=lambda interval: interval.start)
+        return found
+
+
+def free_gaps(busy: Iterable[Interval], start, end, min_length) -> list[tuple]:
+    """
+    Gaps of at least min_length inside [start, end) not covered by any of
+    the busy intervals.
+    """
+    gaps = []
+    cursor = start
+    for interval in sorted(busy, key=lambda interval: interval.start):
+        if interval.start >= interval.end:
+            continue
+        if interval.start > cursor and min(interval.start, end) - cursor >= min_length:
+            gaps.append((cursor, min(interval.start, end)))
+        cursor = max(cursor, interval.end)
+        if cursor >= end:
+            return gaps
+    if end - cursor >= min_length:
+        gaps.append((cursor, end))
+    return gaps
@@ -0,0 +1,156 @@
+from datetime import date, datetime, time, timedelta
+import re
+from typing import Iterable, Iterator, Mapping
+
+from dateutil.rrule import WEEKLY, rrule, rrulestr
+
+# Shorthand rules stored in class_meetings.repeat_rule -> week interval
+SIMPLE_RULES = {None: 1, "": 1, "weekly": 1, "biweekly": 2}
+
+# UTC date-times (UNTIL=...Z, EXDATE values) in a stored rule
+_UTC_DATETIME = re.compile(r"(\d{8}T\d{6})Z", re.IGNORECASE)
+
+# Stored rules that could not be parsed, reported once per process
+_reported_rules: set[str] = set()
+
+
+def first_weekday_on_or_after(start: date, weekday: int) -> date:
+    """weekday follows Python's convention: 0=Monday ... 6=Sunday."""
+    return start + timedelta(days=(weekday - start.weekday()) % 7)
+
+
+def parse_repeat_rule(repeat_rule: str | None, first_date: date, last_date: date):
+    """
+    Builds a dateutil rule for a meeting.
+
+    Accepts "weekly", "biweekly" or an RFC 5545 style rule such as
+    "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE" (optionally with RRULE:/EXDATE: lines).
+    Raises ValueError for rules dateutil cannot parse and for rules with
+    only EXDATE lines.
+    """
+    dtstart = datetime.combine(first_date, time.min)
+    until = datetime.combine(last_date, time.min)
+
+    rule = (repeat_rule or "").strip()
+    if rule.lower() in SIMPLE_RULES:
+        return rrule(
+            WEEKLY,
+            interval=SIMPLE_RULES[rule.lower()],
+            dtstart=dtstart,
+            until=until,
+        )
+
+    lines = [line.strip() for line in rule.splitlines() if line.strip()]
+    if all(line.upper().startswith("EXDATE") for line in lines):
+        raise ValueError("repeat_rule has no RRULE part")
+
+    # Meetings are expanded on naive local dates, so UTC values such as the
+    # usual UNTIL=20250301T000000Z are read as local too; dateutil refuses
+    # to mix them with a naive dtstart
+    rule = _UTC_DATETIME.sub(r"\1", rule)
+    if "RRULE:" not in rule.upper() and "EXDATE" not in rule.upper():
+        rule = f"RRULE:{rule}"
+    return rrulestr(rule, dtstart=dtstart, forceset=True)
+
+
+def parse_stored_rule(repeat_rule: str | None, first_date: date, last_date: date):
+    """
+    parse_repeat_rule for rules read back from the database. Rows written
+    before rules were validated (e.g. "monthly") are expanded as weekly
+    instead of failing the whole schedule, and reported once.
+    """
+    try:
+        return parse_repeat_rule(repeat_rule, first_date, last_date)
+    except ValueError as e:
+        if repeat_rule not in _reported_rules:
+            _reported_rules.add(repeat_rule)
+            print(f"Unreadable repeat_rule {repeat_rule!r}, expanding as weekly: {e}")
+        return parse_repeat_rule("weekly", first_date, last_date)
+
+
+def meeting_dates(
+    weekday: int,
+    repeat_rule: str | None,
+    class_start_date: date,
+    class_end_date: date,
+    range_start: date,
+    range_end: date,
+) -> Iterator[date]:
+    """Dates of one meeting inside [range_start, range_end], both inclusive."""
+    first_date = first_weekday_on_or_after(class_start_date, weekday)
+    if first_date > class_end_date:
+        return
+
+    # The rule is anchored at the first meeting so biweekly/INTERVAL stay aligned
+    rule = parse_stored_rule(repeat_rule, first_date, class_end_date)
+
+    window_start = datetime.combine(max(range_start, first_date), time.min)
+    window_end = datetime.combine(min(range_end, class_end_date), time.min)
+    if window_start > window_end:
+        return
+
+    for occurrence in rule.between(window_start, window_end, inc=True):
+        yield occurrence.date()
+
+
+def holiday_dates(meeting: Mapping, holidays: Iterable[Mapping]) -> set[date]:
+    """
+    Dates the meeting's rule puts on a holiday that applies to its class
+    (class_code NULL for all classes). Keyed by the occurrence date, so
+    rules meeting on several weekdays are covered on each of them.
+    """
+    dates = set()
+    for holiday in holidays:
+        if holiday["class_code"] not in (None, meeting["class_code"]):
+            continue
+        dates.update(
+            meeting_dates(
+                meeting["weekday"],
+                meeting["repeat_rule"],
+                meeting["class_start_date"],
+                meeting["class_end_date"],
+                holiday["start_date"],
+                holiday["end_date"],
+            )
+        )
+    return dates
+
+
+def expand_occurrences(
+    meetings: Iterable[Mapping],
+    cancelled: set[tuple],
+    range_start: date,
+    range_end: date,
+    holidays: Iterable[Mapping] = (),
+) -> list[dict]:
+    """
+    Expands class meetings into dated occurrences, skipping cancelled
+    (meeting id, date) pairs and dates on holidays. Same shape as the
+    monthly classes query.
+    """
+    holidays = list(holidays)
+    occurrences = []
+    for meeting in meetings:
+        on_holiday = holiday_dates(meeting, holidays)
+        for class_date in meeting_dates(
+            meeting["weekday"],
+            meeting["repeat_rule"],
+            meeting["class_start_date"],
+            meeting["class_end_date"],
+            range_start,
+            range_end,
+        ):
+            if (meeting["id"], class_date) in cancelled or class_date in on_holiday:
+                continue
+            occurrences.append(
+                {
+                    "class_date": datetime.combine(class_date, time.min),
+                    "class_code": meeting["class_code"],
+                    "class_name": meeting["class_name"],
+                    "start_time": meeting["start_time"],
+                    "end_time": meeting["end_time"],
+                }
+            )
+
+    occurrences.sort(key=lambda item: (item["class_date"], item["start_time"]))
+    return occurrences
@@ -0,0 +1,117 @@
+"""
+Latency of crud.activity.search_activities over a generated corpus
+(100k activities by default), for word, phrase, prefix and misspelt
+queries, with and without filters, first and second page.
+
+    cd backend && BENCH_DATABASE_URL=postgresql://... \\
+        python benchmarks/bench_activity_search.py [activities] [calls]
+
+Runs against a scratch "bench" schema that is dropped afterwards. The
+database needs a UTF-8 ctype (e.g. LOCALE 'C.UTF-8', as on Supabase) for
+Thai words to be indexed at all.
+"""
+
+import asyncio
+import datetime
+import random
+import sys
+import time
+import uuid
+
+from common import create_scratch_schema, drop_scratch_schema, install_pool, summarize
+
+from crud.activity import search_activities
+from schemas.enums import ActivityCategory
+
+# Topic words, each in the title of ~1/30 of the activities and scattered
+# through descriptions; the rest of the text is drawn from a large
+# synthetic vocabulary so word frequencies resemble real prose
+TOPICS = (
+    "workshop seminar concert football volunteer hackathon robotics photography "
+    "debate marathon orientation festival cooking painting chess badminton "
+    "startup career research library meditation yoga music theatre dance "
+    "ค่าย อาสา ดนตรี กีฬา สัมมนา นิทรรศการ ประกวด ชมรม"
+).split()
+PLACES = ("Main Hall", "Engineering Building", "Library", "Stadium", "Room 301", "Auditorium")
+
+# (label, query, filters)
+QUERIES = (
+    ("word", "hackathon", {}),
+    ("two words", "robotics workshop", {}),
+    ("phrase", '"music festival"', {}),
+    ("excluded word", "concert -dance", {}),
+    ("prefix", "photog", {}),
+    ("misspelt", "marathn", {}),
+    ("thai", "ดนตรี", {}),
+    ("word + category", "seminar", {"category": ActivityCategory.academics.value}),
+    ("word + status", "volunteer", {"status": "upcoming"}),
+)
+
+
+def corpus(size: int, rng: random.Random):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    vocabulary = [
+        "".join(rng.choice(letters) for _ in range(rng.randrange(4, 10)))
+        for _ in range(20_000)
+    ]
+    now = datetime.datetime.now(datetime.timezone.utc)
+    for _ in range(size):
+        start_at = now + datetime.timedelta(hours=rng.randrange(-24 * 365, 24 * 365))
+        description = rng.choices(vocabulary, k=40) + rng.sample(TOPICS, 2)
+        rng.shuffle(description)
+        yield (
+            uuid.UUID(int=rng.getrandbits(128)),
+            f"{rng.choice(TOPICS)} {' '.join(rng.choices(vocabulary, k=2))}".title(),
+            " ".join(description),
+            start_at,
+            start_at + datetime.timedelta(hours=rng.randrange(1, 8)),
+            rng.choice(PLACES),
+            "upcoming",
+            rng.choice(list(ActivityCategory)).value,
+        )
+
+
+async def main(size: int, calls: int) -> None:
+    await create_scratch_schema()
+    try:
+        pool = await install_pool(max_size=1)
+        rng = random.Random(4)
+        started = time.perf_counter()
+        async with pool.acquire() as conn:
+            await conn.copy_records_to_table(
+                "activities",
+                records=list(corpus(size, rng)),
+                columns=[
+                    "id", "title", "description", "start_at", "end_at",
+                    "location_text", "status", "category",
+                ],
+            )
+            await conn.execute("ANALYZE activities")
+        print(f"loaded {size} activities in {time.perf_counter() - started:.1f} s")
+
+        for label, query, filters in QUERIES:
+            first_page, second_page = [], []
+            for _ in range(calls):
+                started = time.perf_counter()
+                rows = await search_activities(query, 20, **filters)
+                first_page.append(time.perf_counter() - started)
+                if len(rows) > 20:
+                    cursor = (rows[19]["rank"], str(rows[19]["id"]))
+                    started = time.perf_counter()
+                    await search_activities(query, 20, cursor=cursor, **filters)
+                    second_page.append(time.perf_counter() - started)
+            print(f"{label:16} page 1 {summarize(first_page)}  rows {len(rows)}")
+            if second_page:
+                print(f"{'':16} page 2 {summarize(second_page)}")
+        await pool.close()
+    finally:
+        await drop_scratch_schema()
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 100_000,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 20,
+        )
+    )
@@ -0,0 +1,79 @@
+"""
+Class occurrences for a month, a semester and a year under each
+CLASS_EXPANSION_MODE: "sql" (generate_series join), "python" (meetings and
+cancellations fetched once, expanded by utils.recurrence) and
+"materialized" (class_occurrences, rebuilt up front).
+
+    cd backend && BENCH_DATABASE_URL=postgresql://... \\
+        python benchmarks/bench_class_expansion.py [calls]
+
+Every meeting is weekly so all three modes return the same rows; the row
+count per call is printed to check that. Runs against a scratch "bench"
+schema that is dropped afterwards.
+"""
+
+import asyncio
+import datetime
+import random
+import sys
+import time
+
+from common import (
+    create_scratch_schema,
+    drop_scratch_schema,
+    install_pool,
+    seed_classes,
+    summarize,
+)
+
+import crud.student_class
+from crud.class_occurrence import rebuild_occurrences
+from crud.student_class import get_classes_between
+from schemas.auth import User
+
+YEAR_START = datetime.date(2025, 1, 6)
+YEAR_END = datetime.date(2025, 12, 19)
+
+RANGES = {
+    "month": (datetime.date(2025, 3, 1), datetime.date(2025, 3, 31)),
+    "semester": (datetime.date(2025, 1, 6), datetime.date(2025, 5, 2)),
+    "year": (YEAR_START, YEAR_END),
+}
+
+
+async def main(calls: int) -> None:
+    await create_scratch_schema()
+    try:
+        pool = await install_pool(max_size=1)
+        async with pool.acquire() as conn:
+            student_ids = await seed_classes(conn, 2000, 6, 2, YEAR_START, YEAR_END)
+            await rebuild_occurrences(conn)
+            await conn.execute("ANALYZE")
+
+        rng = random.Random(3)
+        users = [
+            User(id=rng.choice(student_ids), username="bench", role="student")
+            for _ in range(calls)
+        ]
+
+        for range_name, (range_start, range_end) in RANGES.items():
+            for mode in ("sql", "python", "materialized"):
+                crud.student_class.CLASS_EXPANSION_MODE = mode
+                await get_classes_between(users[0], range_start, range_end)
+                durations = []
+                rows = 0
+                for user in users:
+                    started = time.perf_counter()
+                    rows += len(await get_classes_between(user, range_start, range_end))
+                    durations.append(time.perf_counter() - started)
+                print(
+                    f"{range_name:9} {mode:13} {summarize(durations)}  "
+                    f"rows/call {rows / calls:6.1f}"
+                )
+        await pool.close()
+    finally:
+        await drop_scratch_schema()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
@@ -0,0 +1,88 @@
+"""
+Login burst with and without the dedicated bcrypt pool.
+
+"shared" verifies passwords in a sync route, i.e. on the AnyIO threadpool
+every other sync endpoint uses (the behaviour before the pool). "pooled"
+goes through core.security.verify_password_async. During each burst a sync
+/ping endpoint is called every PING_INTERVAL seconds and its latency is
+reported, which is what the pool is there to protect.
+
+    cd backend && python benchmarks/bench_password_pool.py [logins]
+
+The database is not used, only the bcrypt hash of a fixed password.
+"""
+
+import asyncio
+import sys
+import time
+
+from common import summarize
+
+from fastapi import FastAPI, HTTPException
+import httpx
+
+from core.security import get_hash_password, hash_pool_stats, verify_password, verify_password_async
+
+PING_INTERVAL = 0.02
+
+PASSWORD = "correct horse battery staple"
+HASHED = get_hash_password(PASSWORD)
+
+app = FastAPI()
+
+
+@app.post("/login/shared")
+def login_shared():
+    return {"ok": verify_password(PASSWORD, HASHED)}
+
+
+@app.post("/login/pooled")
+async def login_pooled():
+    return {"ok": await verify_password_async(PASSWORD, HASHED)}
+
+
+@app.get("/ping")
+def ping():
+    return {"ok": True}
+
+
+async def burst(client: httpx.AsyncClient, path: str, logins: int) -> None:
+    ping_latencies = []
+    done = asyncio.Event()
+
+    async def pinger():
+        while not done.is_set():
+            started = time.perf_counter()
+            await client.get("/ping")
+            ping_latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(PING_INTERVAL)
+
+    async def login():
+        response = await client.post(path)
+        return response.status_code
+
+    pinging = asyncio.create_task(pinger())
+    started = time.perf_counter()
+    statuses = await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await pinging
+
+    succeeded = statuses.count(200)
+    print(
+        f"{path:15} {logins} logins in {elapsed:6.2f} s  "
+        f"{succeeded / elapsed:6.2f} logins/s  503s {statuses.count(503)}"
+    )
+    print(f"{'':15} /ping during burst: {summarize(ping_latencies)}")
+
+
+async def main(logins: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in ("/login/shared", "/login/pooled"):
+            await burst(client, path, logins)
+    print(f"pool stats: {hash_pool_stats}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 64))
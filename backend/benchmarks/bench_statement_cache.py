@@ -0,0 +1,75 @@
+"""
+Daily and monthly class queries under each DB_STATEMENT_CACHE_MODE.
+
+"none" re-plans every query, "full" reuses asyncpg's named prepared
+statements and "functions" calls the plpgsql functions from migrations
+002/004, whose plans are cached per connection. Each mode runs on one
+connection with the same random (student, day) calls, so the difference
+between modes is the per-call parse and plan work they avoid.
+
+    cd backend && BENCH_DATABASE_URL=postgresql://... \\
+        python benchmarks/bench_statement_cache.py [calls]
+
+Runs against a scratch "bench" schema that is dropped afterwards.
+"""
+
+import asyncio
+import datetime
+import random
+import sys
+import time
+
+from common import (
+    create_scratch_schema,
+    drop_scratch_schema,
+    install_pool,
+    seed_classes,
+    summarize,
+)
+
+import crud.student_class
+from crud.student_class import get_daily_classes, get_monthly_classes
+from schemas.auth import User
+
+TERM_START = datetime.date(2025, 1, 6)
+TERM_END = datetime.date(2025, 5, 2)
+
+# mode -> asyncpg statement_cache_size, as db.base._create_pool picks it
+MODES = {"none": 0, "full": 256, "functions": 0}
+
+
+async def main(calls: int) -> None:
+    await create_scratch_schema()
+    try:
+        pool = await install_pool()
+        async with pool.acquire() as conn:
+            student_ids = await seed_classes(conn, 2000, 6, 2, TERM_START, TERM_END)
+        await pool.close()
+
+        rng = random.Random(2)
+        days = [TERM_START + datetime.timedelta(days=rng.randrange(110)) for _ in range(calls)]
+        users = [
+            User(id=rng.choice(student_ids), username="bench", role="student")
+            for _ in range(calls)
+        ]
+
+        crud.student_class.CLASS_EXPANSION_MODE = "sql"
+        for mode, cache_size in MODES.items():
+            crud.student_class.statement_cache_mode = mode
+            pool = await install_pool(statement_cache_size=cache_size, max_size=1)
+            for name, query in (("daily", get_daily_classes), ("monthly", get_monthly_classes)):
+                # Warm the connection (and its caches) once
+                await query(users[0], days[0])
+                durations = []
+                for user, day in zip(users, days):
+                    started = time.perf_counter()
+                    await query(user, day)
+                    durations.append(time.perf_counter() - started)
+                print(f"{mode:10} {name:8} {summarize(durations)}")
+            await pool.close()
+    finally:
+        await drop_scratch_schema()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
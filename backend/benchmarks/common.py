@@ -0,0 +1,210 @@
+"""
+Shared helpers for the scripts in this folder. They run against the app's
+own modules, so the usual environment (.env with SUPABASE_URL, SECRET_KEY,
+...) must be present; nothing here talks to Supabase.
+"""
+
+import datetime
+import os
+import random
+import statistics
+import sys
+import uuid
+
+import asyncpg
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+sys.path.insert(0, APP_DIR)
+
+import db.base
+from db.pool_metrics import InstrumentedPool
+from utils.recurrence import meeting_dates
+
+
+def summarize(samples: list[float]) -> str:
+    """p50/p95/max of durations in seconds, formatted in milliseconds."""
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return (
+        f"p50 {statistics.median(ordered) * 1000:8.2f} ms  "
+        f"p95 {p95 * 1000:8.2f} ms  max {ordered[-1] * 1000:8.2f} ms"
+    )
+
+
+# Tables the app expects from the Supabase project, reduced to the columns
+# the queries use. The repo's migrations are applied on top.
+BASE_SCHEMA = """
+CREATE TABLE users (
+    id uuid PRIMARY KEY,
+    username text UNIQUE NOT NULL,
+    password text,
+    first_name_th text,
+    last_name_th text,
+    role text NOT NULL DEFAULT 'student',
+    is_active boolean NOT NULL DEFAULT true
+);
+CREATE TABLE student_classes (
+    id uuid PRIMARY KEY,
+    student_id uuid NOT NULL,
+    class_code text NOT NULL,
+    class_name text NOT NULL,
+    class_start_date date NOT NULL,
+    class_end_date date NOT NULL
+);
+CREATE INDEX ON student_classes (student_id);
+CREATE TABLE class_meetings (
+    id uuid PRIMARY KEY,
+    student_class_id uuid NOT NULL REFERENCES student_classes (id) ON DELETE CASCADE,
+    weekday integer NOT NULL,
+    start_time time NOT NULL,
+    end_time time NOT NULL,
+    repeat_rule text
+);
+CREATE INDEX ON class_meetings (student_class_id);
+CREATE TABLE class_cancellations (
+    id uuid PRIMARY KEY,
+    class_meeting_id uuid NOT NULL REFERENCES class_meetings (id) ON DELETE CASCADE,
+    cancellation_date date NOT NULL,
+    created_by uuid,
+    reason text,
+    UNIQUE (class_meeting_id, cancellation_date)
+);
+CREATE TABLE activities (
+    id uuid PRIMARY KEY,
+    created_by uuid,
+    title text NOT NULL,
+    description text,
+    start_at timestamptz NOT NULL,
+    end_at timestamptz NOT NULL,
+    location_text text,
+    contact_info jsonb,
+    image_path text,
+    status text NOT NULL,
+    category text NOT NULL,
+    created_at timestamptz NOT NULL DEFAULT now(),
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+CREATE TABLE student_activities (
+    id uuid PRIMARY KEY,
+    student_id uuid NOT NULL,
+    activity_id uuid NOT NULL REFERENCES activities (id) ON DELETE CASCADE,
+    added_at timestamptz
+);
+"""
+
+SCHEMA = "bench"
+MIGRATIONS_DIR = os.path.join(os.path.dirname(APP_DIR), "migrations")
+
+
+def bench_dsn() -> str:
+    """
+    A scratch database, deliberately not DATABASE_URL: everything is created
+    in (and afterwards dropped with) the "bench" schema.
+    """
+    dsn = os.environ.get("BENCH_DATABASE_URL")
+    if not dsn:
+        sys.exit("Set BENCH_DATABASE_URL to a scratch Postgres database")
+    return dsn
+
+
+async def create_scratch_schema() -> None:
+    conn = await asyncpg.connect(bench_dsn())
+    try:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.execute(f"CREATE SCHEMA {SCHEMA}")
+        await conn.execute(f"SET search_path = {SCHEMA}, public")
+        await conn.execute(BASE_SCHEMA)
+        for name in sorted(os.listdir(MIGRATIONS_DIR)):
+            if name.endswith(".sql"):
+                with open(os.path.join(MIGRATIONS_DIR, name)) as migration:
+                    await conn.execute(migration.read())
+    finally:
+        await conn.close()
+
+
+async def drop_scratch_schema() -> None:
+    conn = await asyncpg.connect(bench_dsn())
+    try:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    finally:
+        await conn.close()
+
+
+async def install_pool(statement_cache_size: int = 0, max_size: int = 10):
+    """
+    Points db.base.pool at the scratch schema, the way init_db would, and
+    returns it. The caller closes it.
+    """
+    raw_pool = await asyncpg.create_pool(
+        bench_dsn(),
+        min_size=1,
+        max_size=max_size,
+        statement_cache_size=statement_cache_size,
+        server_settings={"search_path": f"{SCHEMA}, public"},
+        init=db.base._init_connection,
+    )
+    db.base.pool = InstrumentedPool(raw_pool)
+    return db.base.pool
+
+
+async def seed_classes(
+    conn,
+    students: int,
+    classes_per_student: int,
+    meetings_per_class: int,
+    term_start,
+    term_end,
+    repeat_rules=(None,),
+    cancelled_share: float = 0.05,
+    seed: int = 1,
+) -> list:
+    """
+    Random timetables for `students` students over one term, plus
+    cancellations for about `cancelled_share` of the meeting dates.
+    Returns the student ids.
+    """
+    rng = random.Random(seed)
+    student_ids = [uuid.UUID(int=rng.getrandbits(128)) for _ in range(students)]
+    classes, meetings, cancellations = [], [], []
+    for student_id in student_ids:
+        for index in range(classes_per_student):
+            class_id = uuid.UUID(int=rng.getrandbits(128))
+            classes.append(
+                (class_id, student_id, f"CS{index:03d}", f"Course {index}", term_start, term_end)
+            )
+            for _ in range(meetings_per_class):
+                meeting_id = uuid.UUID(int=rng.getrandbits(128))
+                weekday = rng.randrange(5)
+                hour = rng.randrange(8, 17)
+                rule = rng.choice(repeat_rules)
+                meetings.append(
+                    (
+                        meeting_id,
+                        class_id,
+                        weekday,
+                        datetime.time(hour),
+                        datetime.time(hour + 1, 30),
+                        rule,
+                    )
+                )
+                for day in meeting_dates(weekday, rule, term_start, term_end, term_start, term_end):
+                    if rng.random() < cancelled_share:
+                        cancellations.append((uuid.UUID(int=rng.getrandbits(128)), meeting_id, day))
+
+    await conn.copy_records_to_table(
+        "student_classes",
+        records=classes,
+        columns=["id", "student_id", "class_code", "class_name", "class_start_date", "class_end_date"],
+    )
+    await conn.copy_records_to_table(
+        "class_meetings",
+        records=meetings,
+        columns=["id", "student_class_id", "weekday", "start_time", "end_time", "repeat_rule"],
+    )
+    await conn.copy_records_to_table(
+        "class_cancellations",
+        records=cancellations,
+        columns=["id", "class_meeting_id", "cancellation_date"],
+    )
+    await conn.execute("ANALYZE")
+    return student_ids
@@ -0,0 +1,4 @@
+-- Per-user token version used by TOKEN_CLAIMS_MODE=claims.
+-- Bump it to revoke every token previously issued to that user.
+ALTER TABLE users
+    ADD COLUMN IF NOT EXISTS token_version integer NOT NULL DEFAULT 0;
@@ -0,0 +1,77 @@
+-- Server-side versions of the daily/monthly class queries used when
+-- DB_STATEMENT_CACHE_MODE=functions. plpgsql caches the plans of the
+-- statements inside a function per backend, so they are planned once per
+-- pooled connection instead of on every call, which also works behind the
+-- Supabase transaction pooler where named prepared statements do not.
+
+CREATE OR REPLACE FUNCTION student_daily_classes(p_date date, p_student_id uuid)
+RETURNS TABLE (
+    class_code text,
+    class_name text,
+    start_time time,
+    end_time time
+)
+LANGUAGE plpgsql STABLE AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        sc.class_code::text,
+        sc.class_name::text,
+        cm.start_time,
+        cm.end_time
+    FROM
+        student_classes AS sc
+    JOIN
+        class_meetings AS cm ON sc.id = cm.student_class_id
+    LEFT JOIN
+        class_cancellations AS cc
+            ON cm.id = cc.class_meeting_id
+            AND cc.cancellation_date = p_date
+    WHERE
+        sc.student_id = p_student_id
+        AND cm.weekday = MOD(EXTRACT(DOW FROM p_date)::int + 6, 7)
+        AND p_date BETWEEN sc.class_start_date AND sc.class_end_date
+        AND cc.id IS NULL
+    ORDER BY
+        cm.start_time;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION student_monthly_classes(
+    p_start date, p_end date, p_student_id uuid
+)
+RETURNS TABLE (
+    class_date timestamp,
+    class_code text,
+    class_name text,
+    start_time time,
+    end_time time
+)
+LANGUAGE plpgsql STABLE AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        dates.class_date::timestamp,
+        sc.class_code::text,
+        sc.class_name::text,
+        cm.start_time,
+        cm.end_time
+    FROM
+        generate_series(p_start, p_end, '1 day'::interval) AS dates(class_date)
+    JOIN
+        class_meetings AS cm
+            ON MOD(EXTRACT(DOW FROM dates.class_date) + 6, 7) = cm.weekday
+    JOIN
+        student_classes AS sc ON cm.student_class_id = sc.id
+    LEFT JOIN
+        class_cancellations AS cc
+            ON cm.id = cc.class_meeting_id
+            AND dates.class_date = cc.cancellation_date
+    WHERE
+        sc.student_id = p_student_id
+        AND dates.class_date BETWEEN sc.class_start_date AND sc.class_end_date
+        AND cc.id IS NULL
+    ORDER BY
+        dates.class_date, cm.start_time;
+END;
+$$;
@@ -0,0 +1,17 @@
+-- Materialized class occurrences used when CLASS_EXPANSION_MODE=materialized.
+-- Maintained by create_student_class_crud / cancel_student_class_crud and
+-- rebuilt with `python -m services.class_occurrences rebuild`.
+CREATE TABLE IF NOT EXISTS class_occurrences (
+    class_meeting_id uuid NOT NULL REFERENCES class_meetings (id) ON DELETE CASCADE,
+    class_date date NOT NULL,
+    student_id uuid NOT NULL,
+    student_class_id uuid NOT NULL REFERENCES student_classes (id) ON DELETE CASCADE,
+    class_code text NOT NULL,
+    class_name text NOT NULL,
+    start_time time NOT NULL,
+    end_time time NOT NULL,
+    PRIMARY KEY (class_meeting_id, class_date)
+);
+
+CREATE INDEX IF NOT EXISTS class_occurrences_student_date_idx
+    ON class_occurrences (student_id, class_date, start_time);
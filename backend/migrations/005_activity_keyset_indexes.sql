@@ -0,0 +1,12 @@
+-- Indexes for the keyset-paginated thumbnail listing, which orders by
+-- (start_at DESC, id DESC) and optionally filters on status or category.
+-- Each filter has its equality column first so a page is a single index
+-- range scan that stops after `limit` rows.
+CREATE INDEX IF NOT EXISTS activities_start_at_id_idx
+    ON activities (start_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS activities_status_start_at_id_idx
+    ON activities (status, start_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS activities_category_start_at_id_idx
+    ON activities (category, start_at DESC, id DESC);
@@ -0,0 +1,27 @@
+-- Search over activities for GET /activities/search.
+--
+-- search_vector uses the 'simple' configuration (no stemming, no stop
+-- words) because titles and descriptions mix Thai and English; Thai is not
+-- space-delimited, so the trigram indexes cover partial words and typos
+-- that full-text matching misses.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE activities
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(location_text, '')), 'B')
+        || setweight(to_tsvector('simple', coalesce(description, '')), 'C')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS activities_search_vector_idx
+    ON activities USING gin (search_vector);
+
+CREATE INDEX IF NOT EXISTS activities_title_trgm_idx
+    ON activities USING gin (title gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS activities_location_text_trgm_idx
+    ON activities USING gin (location_text gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS activities_description_trgm_idx
+    ON activities USING gin (description gin_trgm_ops);
@@ -0,0 +1,5 @@
+-- URLs of the resized copies of an activity's image, keyed by size name
+-- ("thumb", "card", "full", plus "<size>_jpg" fallbacks). image_path keeps
+-- pointing at the full-size copy; NULL for images uploaded before variants.
+ALTER TABLE activities
+    ADD COLUMN IF NOT EXISTS image_variants jsonb;
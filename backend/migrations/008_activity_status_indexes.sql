@@ -0,0 +1,10 @@
+-- The status filters of the keyset listing are derived from start_at and
+-- end_at (see services/activity_status.py STATUS_CONDITIONS), and are range
+-- conditions on activities_start_at_id_idx from 005. The (status, start_at,
+-- id) index only still served 'cancelled', so it is replaced by a partial
+-- index over the few cancelled rows.
+DROP INDEX IF EXISTS activities_status_start_at_id_idx;
+
+CREATE INDEX IF NOT EXISTS activities_cancelled_start_at_id_idx
+    ON activities (start_at DESC, id DESC)
+    WHERE status = 'cancelled';
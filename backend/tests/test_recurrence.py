@@ -0,0 +1,71 @@
+from datetime import date, time
+
+from utils.recurrence import expand_occurrences, holiday_dates
+
+# Monday and Wednesday 09:00-10:30 through January 2025
+MEETING = {
+    "id": "meeting-1",
+    "weekday": 0,
+    "repeat_rule": "FREQ=WEEKLY;BYDAY=MO,WE",
+    "class_code": "CS101",
+    "class_name": "Programming",
+    "class_start_date": date(2025, 1, 6),
+    "class_end_date": date(2025, 1, 31),
+    "start_time": time(9, 0),
+    "end_time": time(10, 30),
+}
+
+
+def holiday(start_date, end_date, class_code=None):
+    return {
+        "name": "Holiday",
+        "start_date": start_date,
+        "end_date": end_date,
+        "class_code": class_code,
+    }
+
+
+def class_dates(occurrences):
+    return [item["class_date"].date() for item in occurrences]
+
+
+def test_holiday_on_second_weekday_of_rule_is_skipped():
+    occurrences = expand_occurrences(
+        [MEETING],
+        set(),
+        date(2025, 1, 6),
+        date(2025, 1, 12),
+        [holiday(date(2025, 1, 8), date(2025, 1, 8))],
+    )
+
+    assert class_dates(occurrences) == [date(2025, 1, 6)]
+
+
+def test_holiday_spanning_both_weekdays():
+    dates = holiday_dates(MEETING, [holiday(date(2025, 1, 13), date(2025, 1, 19))])
+
+    assert dates == {date(2025, 1, 13), date(2025, 1, 15)}
+
+
+def test_holiday_for_another_class_is_ignored():
+    occurrences = expand_occurrences(
+        [MEETING],
+        set(),
+        date(2025, 1, 6),
+        date(2025, 1, 12),
+        [holiday(date(2025, 1, 8), date(2025, 1, 8), class_code="MA201")],
+    )
+
+    assert class_dates(occurrences) == [date(2025, 1, 6), date(2025, 1, 8)]
+
+
+def test_cancellations_and_holidays_combine():
+    occurrences = expand_occurrences(
+        [MEETING],
+        {("meeting-1", date(2025, 1, 6))},
+        date(2025, 1, 6),
+        date(2025, 1, 15),
+        [holiday(date(2025, 1, 8), date(2025, 1, 8), class_code="CS101")],
+    )
+
+    assert class_dates(occurrences) == [date(2025, 1, 13), date(2025, 1, 15)]